@@ -0,0 +1,265 @@
+"""ASCII fast path for the lexer working directly on bytes.
+
+`lexer` runs every FSM one character at a time on a decoded `str`, and the
+`ID` FSM relies on the Unicode-aware `str.isalpha()` and `str.isalnum()`.
+Almost all Datalog input is pure ASCII, where those reduce to `[A-Za-z]` and
+`[A-Za-z0-9]`. `lexer_bytes` takes the input as `bytes` (or any buffer such
+as a `memoryview`), dispatches on the first byte of each token through a
+256-entry lookup table, and matches the longer token kinds with compiled
+byte patterns. It yields exactly the tokens `lexer` would for the decoded
+input. Input with any byte outside ASCII is decoded and handed to `lexer`.
+
+Examples:
+    >>> from project1.ascii_lexer import lexer_bytes
+    >>> [str(i) for i in lexer_bytes(b"Facts:\\n  a('b').")][:4]
+    ['(FACTS,"Facts",1)', '(COLON,":",1)', '(ID,"a",2)', '(LEFT_PAREN,"(",2)']
+"""
+
+import re
+from typing import Collection, Iterator
+
+from project1.lexer import DEFAULT_HIDDEN, Span, _hidden_types, lexer
+from project1.limits import (
+    NO_LIMITS,
+    Budget,
+    LexLimits,
+    check_input_size,
+    token_too_long,
+)
+from project1.symbols import SYMBOL_TYPES, SymbolTable
+from project1.token import Token, TokenType
+
+Buffer = bytes | bytearray | memoryview
+"""The input types accepted by `lexer_bytes`."""
+
+_UNDEFINED = 0
+_WHITESPACE = 1
+_SINGLE = 2
+_COLON = 3
+_COMMENT = 4
+_STRING = 5
+_ID = 6
+
+_kinds: list[int] = [_UNDEFINED] * 256
+for _i in b" \t\r\n":
+    _kinds[_i] = _WHITESPACE
+for _i in b",.?()":
+    _kinds[_i] = _SINGLE
+for _i in b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz":
+    _kinds[_i] = _ID
+_kinds[ord(":")] = _COLON
+_kinds[ord("#")] = _COMMENT
+_kinds[ord("'")] = _STRING
+_KINDS: tuple[int, ...] = tuple(_kinds)
+"""Token kind for each possible first byte, read-only so threads can share it."""
+
+_SINGLE_TYPES: dict[int, TokenType] = {
+    ord(","): TokenType.COMMA,
+    ord("."): TokenType.PERIOD,
+    ord("?"): TokenType.Q_MARK,
+    ord("("): TokenType.LEFT_PAREN,
+    ord(")"): TokenType.RIGHT_PAREN,
+}
+_KEYWORDS: dict[bytes, TokenType] = {
+    b"Schemes": TokenType.SCHEMES,
+    b"Facts": TokenType.FACTS,
+    b"Rules": TokenType.RULES,
+    b"Queries": TokenType.QUERIES,
+}
+_KEYWORD_LENGTHS = frozenset(len(i) for i in _KEYWORDS)
+
+_WHITESPACE_RUN = re.compile(rb"[ \t\r\n]+")
+_ID_RUN = re.compile(rb"[A-Za-z][A-Za-z0-9]*")
+_COMMENT_RUN = re.compile(rb"#[^\n]*")
+_STRING_RUN = re.compile(rb"'(?:[^']++|'')*+'")
+_REST_OF_LINE = re.compile(rb"[^\n]*")
+_NON_ASCII = re.compile(rb"[^\x00-\x7f]")
+
+
+def is_ascii(data: Buffer) -> bool:
+    """Return whether every byte in `data` is ASCII."""
+    if isinstance(data, memoryview):
+        return _NON_ASCII.search(data) is None
+    return data.isascii()
+
+
+def scan_bytes(
+    data: Buffer,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    final: bool = True,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[Span]:
+    """Yield the tokens of ASCII `data` as spans (see `project1.lexer.scan`).
+
+    The caller must check `is_ascii(data)` first: the spans index bytes, which
+    only line up with the characters of the decoded text for ASCII input.
+    With `final` False the scan stops before the first token that more input
+    could change, as `scan` does. `limits` are applied as in `scan`, with
+    lengths and positions in bytes.
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED.
+        LexLimitError: if lexing goes over one of `limits` (see `project1.limits`).
+
+    Examples:
+        >>> from project1.ascii_lexer import scan_bytes
+        >>> [(i.name, start, end, line) for i, start, end, line in scan_bytes(b"a :-")]
+        [('ID', 0, 1, 1), ('COLON_DASH', 2, 4, 1), ('EOF', 4, 4, 1)]
+    """
+    hidden_types = _hidden_types(hidden)
+    kinds = _KINDS
+    # Enum members are class attributes, which are slow to look up per token.
+    id_type = TokenType.ID
+    string_type = TokenType.STRING
+    whitespace_type = TokenType.WHITESPACE
+    hide_whitespace = whitespace_type in hidden_types
+    hide_string = string_type in hidden_types
+    size = len(data)
+    check_input_size(size, limits)
+    max_length = limits.max_token_length
+    budget = (
+        None
+        if limits.max_steps is None and limits.max_seconds is None
+        else Budget(limits)
+    )
+    line_num = 1
+    position = 0
+    bound = size
+    while position < size:
+        if budget is not None:
+            budget.step(position, line_num)
+        if max_length is not None:
+            bound = min(size, position + max_length + 1)
+        kind = kinds[data[position]]
+        if kind == _WHITESPACE:
+            match = _WHITESPACE_RUN.match(data, position, bound)
+            assert match is not None
+            end = match.end()
+            if max_length is not None and end - position > max_length:
+                raise token_too_long(limits, position, line_num)
+            if not final and end >= size:
+                return
+            if not hide_whitespace:
+                yield whitespace_type, position, end, line_num
+            line_num += match.group().count(b"\n")
+            position = end
+            continue
+
+        token_type: TokenType
+        if kind == _SINGLE:
+            token_type = _SINGLE_TYPES[data[position]]
+            end = position + 1
+        elif kind == _ID:
+            match = _ID_RUN.match(data, position, bound)
+            assert match is not None
+            end = match.end()
+            token_type = id_type
+            if end - position in _KEYWORD_LENGTHS:
+                token_type = _KEYWORDS.get(bytes(data[position:end]), id_type)
+        elif kind == _COLON:
+            if position + 1 < size and data[position + 1] == ord("-"):
+                token_type = TokenType.COLON_DASH
+                end = position + 2
+            else:
+                token_type = TokenType.COLON
+                end = position + 1
+        elif kind == _COMMENT:
+            match = _COMMENT_RUN.match(data, position, bound)
+            assert match is not None
+            token_type = TokenType.COMMENT
+            end = match.end()
+        elif kind == _STRING and (match := _STRING_RUN.match(data, position, bound)):
+            end = match.end()
+            if max_length is not None and end - position > max_length:
+                raise token_too_long(limits, position, line_num)
+            if not final and end >= size:
+                return
+            if not hide_string:
+                yield string_type, position, end, line_num
+            line_num += match.group().count(b"\n")
+            position = end
+            continue
+        else:
+            if kind == _STRING and bound < size:
+                raise token_too_long(limits, position, line_num)
+            if not final and (kind == _STRING or position + 1 >= size):
+                return
+            yield TokenType.UNDEFINED, position, position + 1, line_num
+            if not recover:
+                return
+            if kind == _STRING:
+                match = _REST_OF_LINE.match(data, position)
+                assert match is not None
+                position = match.end()
+            else:
+                position += 1
+            continue
+
+        if max_length is not None and end - position > max_length:
+            raise token_too_long(limits, position, line_num)
+        if not final and end >= size:
+            return
+        if token_type not in hidden_types:
+            yield token_type, position, end, line_num
+        position = end
+
+    if final:
+        yield TokenType.EOF, size, size, line_num
+
+
+def lexer_bytes(
+    data: Buffer,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    encoding: str = "utf-8",
+    symbols: SymbolTable | None = None,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[Token]:
+    """Yield the tokens for `data` ending with EOF.
+
+    Matches `lexer(data.decode(encoding), recover, hidden)` token for token.
+    ASCII input is lexed directly from the buffer by `scan_bytes`; anything
+    else is decoded with `encoding` and lexed by `lexer`.
+
+    Args:
+        data: The bytes to tokenize.
+        recover: Keep lexing after an UNDEFINED token.
+        hidden: The token types to leave out of the output.
+        encoding: The encoding used to decode input that is not ASCII.
+        symbols: The table to intern ID and STRING values in (see `project1.symbols`).
+        limits: The limits on input size, token length, steps and time.
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED.
+        LexLimitError: if lexing goes over one of `limits` (see `project1.limits`).
+
+    Examples:
+        >>> from project1.ascii_lexer import lexer_bytes
+        >>> [str(i) for i in lexer_bytes(memoryview(b"'it''s'!"))]
+        ['(STRING,"\\'it\\'\\'s\\'",1)', '(UNDEFINED,"!",1)']
+        >>> [str(i) for i in lexer_bytes("é".encode())]
+        ['(ID,"é",1)', '(EOF,"",1)']
+    """
+    if not is_ascii(data):
+        check_input_size(len(data), limits)
+        yield from lexer(
+            bytes(data).decode(encoding),
+            recover,
+            hidden,
+            symbols=symbols,
+            limits=limits,
+        )
+        return
+    spans = scan_bytes(data, recover, hidden, limits=limits)
+    if symbols is None:
+        for token_type, start, end, line_num in spans:
+            yield Token(token_type, str(data[start:end], "ascii"), line_num)
+        return
+    for token_type, start, end, line_num in spans:
+        value = str(data[start:end], "ascii")
+        if token_type in SYMBOL_TYPES:
+            symbol_id = symbols.intern(value)
+            yield Token(token_type, symbols.values[symbol_id], line_num, symbol_id)
+        else:
+            yield Token(token_type, value, line_num)
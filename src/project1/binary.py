@@ -0,0 +1,261 @@
+"""Compact binary serialization of a token stream.
+
+The text form `(TYPE,"value",line)` from `Token.__str__` is easy to read but
+slow to produce and to parse back. This module defines a versioned binary
+format for the same token stream along with a streaming writer and a reader
+that works directly on a buffer, including a memory-mapped file.
+
+The layout is a header, one record per token, and a trailer:
+
+    header:  b"P1TK" followed by the format version as one byte
+    record:  type code (one byte), line delta (varint), value reference (varint)
+    trailer: END_OF_STREAM (one byte) followed by the token count (varint)
+
+The type code is the `TokenType` value, its index in `TOKEN_TYPES`. Line numbers
+never decrease in a token stream, so each record stores the difference from
+the line of the previous token (the first is relative to 0). Values are kept
+in a string table that is built as the stream is written: a reference of 0
+means a new string follows as a varint byte length and its UTF-8 bytes, and
+that string is added to the end of the table; a reference `k > 0` reuses the
+`k - 1` entry in the table. A varint is the usual little-endian base 128
+encoding where the high bit of each byte marks that more bytes follow.
+
+Examples:
+    >>> import io
+    >>> from project1.binary import write_tokens, read_tokens
+    >>> from project1.lexer import lexer
+    >>> buffer = io.BytesIO()
+    >>> write_tokens(lexer("a(b)\\na."), buffer)
+    7
+    >>> [str(i) for i in read_tokens(buffer.getvalue())][:3]
+    ['(ID,"a",1)', '(LEFT_PAREN,"(",1)', '(ID,"b",1)']
+"""
+
+import mmap
+from types import TracebackType
+from typing import BinaryIO, Iterable, Iterator
+
+from project1.token import Token, TokenType
+
+MAGIC = b"P1TK"
+"""The first bytes of every binary token stream."""
+
+VERSION = 1
+"""The version of the format written by `TokenWriter`."""
+
+END_OF_STREAM = 0xFF
+"""The type code that marks the trailer."""
+
+TOKEN_TYPES: tuple[TokenType, ...] = tuple(TokenType)
+"""The token types indexed by their type code."""
+
+_FLUSH_SIZE = 1 << 16
+
+
+class BinaryFormatError(ValueError):
+    """Raised when a buffer is not a well-formed binary token stream."""
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class TokenWriter:
+    """Streaming writer for the binary token format.
+
+    Tokens are encoded into an internal buffer that is flushed to `stream`
+    whenever it grows past 64 KiB, so memory use does not depend on the
+    length of the token stream (apart from the string table). `close` writes
+    the trailer; the writer is also a context manager that closes itself.
+
+    Attributes:
+        count (int): The number of tokens written so far.
+    """
+
+    __slots__ = ["_stream", "_buffer", "_strings", "_line_num", "count"]
+
+    def __init__(self, stream: BinaryIO) -> None:
+        """Start a token stream by writing the header to `stream`.
+
+        Args:
+            stream: A binary file-like object to write to.
+        """
+        self._stream = stream
+        self._buffer = bytearray(MAGIC)
+        self._buffer.append(VERSION)
+        self._strings: dict[str, int] = {}
+        self._line_num = 0
+        self.count = 0
+
+    def write(self, token: Token) -> None:
+        """Append one token to the stream.
+
+        Raises:
+            ValueError: if the token line is before the line of the previous token.
+        """
+        delta = token.line_num - self._line_num
+        if delta < 0:
+            raise ValueError(
+                "line numbers must not decrease: {} after {}".format(
+                    token.line_num, self._line_num
+                )
+            )
+        buffer = self._buffer
+        buffer.append(token.token_type)
+        _put_varint(buffer, delta)
+        ref = self._strings.get(token.value)
+        if ref is None:
+            self._strings[token.value] = len(self._strings) + 1
+            encoded = token.value.encode("utf-8")
+            buffer.append(0)
+            _put_varint(buffer, len(encoded))
+            buffer += encoded
+        else:
+            _put_varint(buffer, ref)
+        self._line_num = token.line_num
+        self.count += 1
+        if len(buffer) >= _FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write any buffered records to the underlying stream."""
+        self._stream.write(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Write the trailer and flush. The underlying stream is left open."""
+        self._buffer.append(END_OF_STREAM)
+        _put_varint(self._buffer, self.count)
+        self.flush()
+
+    def __enter__(self) -> "TokenWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+
+
+def write_tokens(tokens: Iterable[Token], stream: BinaryIO) -> int:
+    """Write a complete binary token stream.
+
+    Args:
+        tokens: The tokens to write, consumed lazily.
+        stream: A binary file-like object to write to.
+
+    Returns:
+        count: the number of tokens written.
+    """
+    with TokenWriter(stream) as writer:
+        for i in tokens:
+            writer.write(i)
+    return writer.count
+
+
+def read_tokens(data: bytes | bytearray | memoryview | mmap.mmap) -> Iterator[Token]:
+    """Decode the tokens in a binary token stream.
+
+    Decoding is lazy and works on any buffer without copying it first, so a
+    memory-mapped file is read only as far as the tokens are consumed.
+
+    Args:
+        data: The buffer holding the binary token stream.
+
+    Raises:
+        BinaryFormatError: if the header, a record, or the trailer is malformed.
+    """
+    view = memoryview(data)
+    size = len(view)
+    pos = 5
+    line_num = 0
+    count = 0
+    strings: list[str] = []
+    try:
+        if bytes(view[:4]) != MAGIC:
+            raise BinaryFormatError("not a binary token stream")
+        if size < 5 or view[4] != VERSION:
+            raise BinaryFormatError("unsupported format version")
+
+        while True:
+            code = view[pos]
+            pos += 1
+
+            if code == END_OF_STREAM:
+                total = shift = 0
+                while True:
+                    byte = view[pos]
+                    pos += 1
+                    total |= (byte & 0x7F) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                if total != count:
+                    raise BinaryFormatError(
+                        "trailer counts {} tokens but found {}".format(total, count)
+                    )
+                return
+            if code >= len(TOKEN_TYPES):
+                raise BinaryFormatError(
+                    "bad type code {} at byte {}".format(code, pos - 1)
+                )
+
+            delta = shift = 0
+            while True:
+                byte = view[pos]
+                pos += 1
+                delta |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            ref = shift = 0
+            while True:
+                byte = view[pos]
+                pos += 1
+                ref |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+
+            if ref == 0:
+                length = shift = 0
+                while True:
+                    byte = view[pos]
+                    pos += 1
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                if pos + length > size:
+                    raise BinaryFormatError("truncated string at byte {}".format(pos))
+                value = str(view[pos : pos + length], "utf-8")
+                pos += length
+                strings.append(value)
+            else:
+                value = strings[ref - 1]
+
+            line_num += delta
+            count += 1
+            yield Token(TOKEN_TYPES[code], value, line_num)
+    except IndexError:
+        raise BinaryFormatError("malformed token stream at byte {}".format(pos))
+    except UnicodeDecodeError:
+        raise BinaryFormatError("invalid UTF-8 string at byte {}".format(pos))
+    finally:
+        view.release()
+
+
+def load_tokens(path: str) -> Iterator[Token]:
+    """Memory-map the binary token stream in the file at `path` and decode it.
+
+    The file stays mapped until the returned iterator is exhausted or closed.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        yield from read_tokens(m)
@@ -0,0 +1,280 @@
+"""Sparse checkpoint index for lexing a range of lines without the whole file.
+
+Getting the tokens for lines 1,200,000 to 1,200,050 of a big file should not
+mean lexing the 1,199,999 lines before them. `build_index` lexes a file once
+and records a `Checkpoint` about every `every` lines: the line number and
+the byte offset of a token that starts on that line. `lex_lines` then seeks
+to the nearest checkpoint at or before the first wanted line and lexes
+forward only until the range is done.
+
+Between tokens the lexer carries nothing from one token to the next but the
+line number: which FSM matches depends only on the text from the start of
+the token on. Lexing from a checkpoint therefore gives exactly the tokens a
+full lex gives from that point. Without `recover` a full lex stops at the
+first UNDEFINED token, so the index records where that is and `lex_lines`
+never resumes past it.
+
+Offsets are into the file as read by `open_input`, after decompression and
+before newlines are translated, so a checkpoint can be seeked to directly.
+`write_index` and `read_index` save an index in a small sidecar file:
+
+    MAGIC, the version as one byte, then varints (as in `project1.binary`)
+    for `every`, `size`, the first error offset plus one (0 for none), the
+    number of checkpoints, and then each checkpoint as the increase in line
+    number and in offset from the one before.
+
+Examples:
+    >>> import os, tempfile
+    >>> from project1.checkpoints import build_index, lex_lines
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     path = os.path.join(d, "t.txt")
+    ...     with open(path, "w") as f:
+    ...         _ = f.write("".join("f{}('x').\\n".format(i) for i in range(10)))
+    ...     index = build_index(path, every=4)
+    ...     print(index.checkpoints)
+    ...     print(*lex_lines(path, index, 6, 6))
+    (Checkpoint(line_num=1, offset=0), Checkpoint(line_num=5, offset=36), Checkpoint(line_num=9, offset=72))
+    (ID,"f5",6) (LEFT_PAREN,"(",6) (STRING,"'x'",6) (RIGHT_PAREN,")",6) (PERIOD,".",6)
+"""
+
+import locale
+import os
+import re
+from bisect import bisect_left
+from io import TextIOWrapper
+from typing import BinaryIO, Callable, Collection, Iterator, NamedTuple
+
+from project1.binary import BinaryFormatError, _put_varint
+from project1.compressed import open_input
+from project1.lexer import DEFAULT_HIDDEN
+from project1.pipeline import CHUNK_SIZE, _spans, lex_chunks, read_chunks
+from project1.symbols import _get_varint
+from project1.token import Token, TokenType
+
+CHECKPOINT_EVERY = 1000
+"""The default number of lines between checkpoints."""
+
+MAGIC = b"P1IX"
+"""The first bytes of a checkpoint index written by `write_index`."""
+
+VERSION = 1
+"""The version of the checkpoint index format written by `write_index`."""
+
+
+class Checkpoint(NamedTuple):
+    """A place to resume lexing from.
+
+    Attributes:
+        line_num (int): The line the token at `offset` starts on.
+        offset (int): The byte offset of the start of a token.
+    """
+
+    line_num: int
+    offset: int
+
+
+class CheckpointIndex(NamedTuple):
+    """The checkpoints `build_index` found in one file.
+
+    Attributes:
+        every (int): The number of lines the checkpoints are apart.
+        size (int): The size of the file on disk when it was indexed.
+        first_error (int | None): The byte offset of the first UNDEFINED token, if any.
+        checkpoints (tuple[Checkpoint, ...]): The checkpoints in file order,
+            the first always at line 1 and offset 0.
+    """
+
+    every: int
+    size: int
+    first_error: int | None
+    checkpoints: tuple[Checkpoint, ...]
+
+    def checkpoint_for(self, line_num: int, recover: bool = False) -> Checkpoint:
+        """Return the last checkpoint at or before `line_num` to lex from.
+
+        Without `recover` no checkpoint after the first error is returned,
+        since a full lex stops there.
+        """
+        best = self.checkpoints[0]
+        for i in self.checkpoints:
+            if i.line_num > line_num:
+                break
+            if not recover and self.first_error is not None:
+                if i.offset > self.first_error:
+                    break
+            best = i
+        return best
+
+
+def _offsets(text: str, encoding: str) -> Callable[[int], tuple[int, int]]:
+    """Map positions in `text` with its newlines translated back into `text`.
+
+    The returned function takes a position in the translated text and gives
+    the index of the same character in `text` and its offset in bytes once
+    encoded. Positions must not decrease from one call to the next.
+    """
+    # Where each "\r\n" in `text` became one "\n" in the translated text.
+    merged = [m.start() - i for i, m in enumerate(re.finditer("\r\n", text))]
+    ascii_only = text.isascii()
+    char_at = byte_at = 0
+
+    def offset(position: int) -> tuple[int, int]:
+        nonlocal char_at, byte_at
+        char = position + bisect_left(merged, position)
+        if ascii_only:
+            return char, char
+        byte_at += len(text[char_at:char].encode(encoding))
+        char_at = char
+        return char, byte_at
+
+    return offset
+
+
+def build_index(
+    input_file: str, every: int = CHECKPOINT_EVERY, chunk_size: int = CHUNK_SIZE
+) -> CheckpointIndex:
+    """Lex a file and record a checkpoint about every `every` lines.
+
+    The file is lexed the way `project1cli` lexes it, but read and scanned
+    `chunk_size` characters at a time as in `project1.pipeline.lex_chunks`,
+    so memory stays bounded by the chunk size (or the longest token) however
+    large the file is. A checkpoint goes at the first token, hidden or not,
+    that starts on or after each line `1 + k * every`; a whitespace token
+    spanning several lines can put it a few lines late.
+
+    Raises:
+        ValueError: if `every` is less than 1.
+    """
+    if every < 1:
+        raise ValueError("every must be at least 1, not {}".format(every))
+    size = os.path.getsize(input_file)
+    encoding = locale.getpreferredencoding(False)
+    checkpoints: list[Checkpoint] = []
+    first_error: int | None = None
+    next_line = 1
+    undefined = TokenType.UNDEFINED
+
+    # `raw` is the text not yet lexed, with its newlines as in the file, and
+    # starts `raw_base` bytes and `line_base` lines into the file.
+    raw = ""
+    raw_base = line_base = rescan_at = 0
+    final = False
+    with TextIOWrapper(open_input(input_file), encoding=encoding, newline="") as f:
+        while not final:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                final = True
+            else:
+                raw += chunk
+                if len(raw) < rescan_at:
+                    continue
+
+            # A "\r" at the end waits to see whether a "\n" follows it.
+            text = raw if final or not raw.endswith("\r") else raw[:-1]
+            lexed = (
+                text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+            )
+            offset = _offsets(text, encoding)
+            consumed = 0
+            for token_type, start, end, line_num in _spans(lexed, True, final):
+                consumed = end
+                line_num += line_base
+                if line_num >= next_line:
+                    checkpoints.append(
+                        Checkpoint(line_num, raw_base + offset(start)[1])
+                    )
+                    next_line = (line_num - 1) // every * every + every + 1
+                if token_type is undefined and first_error is None:
+                    first_error = raw_base + offset(start)[1]
+
+            line_base += lexed.count("\n", 0, consumed)
+            char, byte = offset(consumed)
+            raw_base += byte
+            raw = raw[char:]
+            rescan_at = 2 * len(raw) if consumed == 0 else 0
+    return CheckpointIndex(every, size, first_error, tuple(checkpoints))
+
+
+def lex_lines(
+    input_file: str,
+    index: CheckpointIndex,
+    first: int,
+    last: int,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+) -> Iterator[Token]:
+    """Yield the tokens a full lex of the file has on lines `first` to `last`.
+
+    Lexing starts at `index.checkpoint_for(first, recover)` and stops at
+    the first token past `last`. A token belongs to the line it starts on,
+    as its `line_num` says, and EOF is included when its line is in range.
+
+    Raises:
+        ValueError: if the range is empty or the file has changed size since
+            it was indexed.
+    """
+    if first < 1 or last < first:
+        raise ValueError("no lines in {}:{}".format(first, last))
+    if os.path.getsize(input_file) != index.size:
+        raise ValueError("{} has changed since it was indexed".format(input_file))
+    checkpoint = index.checkpoint_for(first, recover)
+    chunks = read_chunks(input_file, offset=checkpoint.offset)
+    try:
+        for i in lex_chunks(chunks, recover, hidden, checkpoint.line_num):
+            if i.line_num > last:
+                return
+            if i.line_num >= first:
+                yield i
+    finally:
+        chunks.close()
+
+
+def write_index(index: CheckpointIndex, stream: BinaryIO) -> int:
+    """Write `index` to `stream` and return the number of checkpoints written."""
+    buffer = bytearray(MAGIC)
+    buffer.append(VERSION)
+    _put_varint(buffer, index.every)
+    _put_varint(buffer, index.size)
+    _put_varint(buffer, 0 if index.first_error is None else index.first_error + 1)
+    _put_varint(buffer, len(index.checkpoints))
+    line_num = offset = 0
+    for i in index.checkpoints:
+        _put_varint(buffer, i.line_num - line_num)
+        _put_varint(buffer, i.offset - offset)
+        line_num, offset = i
+    stream.write(buffer)
+    return len(index.checkpoints)
+
+
+def read_index(data: bytes | bytearray | memoryview) -> CheckpointIndex:
+    """Read a checkpoint index written by `write_index`.
+
+    Raises:
+        BinaryFormatError: if `data` is not a well-formed checkpoint index.
+    """
+    view = memoryview(data)
+    if bytes(view[:4]) != MAGIC:
+        raise BinaryFormatError("not a checkpoint index")
+    if len(view) < 5 or view[4] != VERSION:
+        raise BinaryFormatError("unsupported checkpoint index version")
+    pos = 5
+    checkpoints: list[Checkpoint] = []
+    try:
+        every, pos = _get_varint(view, pos)
+        size, pos = _get_varint(view, pos)
+        first_error, pos = _get_varint(view, pos)
+        count, pos = _get_varint(view, pos)
+        line_num = offset = 0
+        for _ in range(count):
+            line_delta, pos = _get_varint(view, pos)
+            offset_delta, pos = _get_varint(view, pos)
+            line_num += line_delta
+            offset += offset_delta
+            checkpoints.append(Checkpoint(line_num, offset))
+    except IndexError:
+        raise BinaryFormatError("malformed checkpoint index at byte {}".format(pos))
+    if not checkpoints or checkpoints[0] != (1, 0) or every < 1:
+        raise BinaryFormatError("checkpoint index does not start at line 1")
+    return CheckpointIndex(
+        every, size, None if first_error == 0 else first_error - 1, tuple(checkpoints)
+    )
@@ -0,0 +1,78 @@
+"""Transparent reading of gzip, bz2 and xz compressed input files.
+
+Archived Datalog corpora are often stored compressed. `open_input` looks at
+the first bytes of a file and, when they are the magic number of a format
+the standard library reads, returns a stream that decompresses as it is
+read. Nothing is written to a temporary file, and read in chunks (see
+`project1.pipeline.read_chunks`) the decompressed text is never held in
+memory at once.
+
+Examples:
+    >>> import gzip, os, tempfile
+    >>> from project1.compressed import open_input
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     path = os.path.join(d, "t.dl.gz")
+    ...     with gzip.open(path, "wb") as f:
+    ...         _ = f.write(b"Facts: a('b').")
+    ...     with open_input(path) as f:
+    ...         f.read()
+    b"Facts: a('b')."
+"""
+
+import bz2
+import gzip
+import lzma
+import zlib
+from typing import BinaryIO, cast
+
+COMPRESSION_MAGIC: dict[bytes, str] = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+}
+"""The compression format for each magic number that is recognized."""
+
+DECOMPRESSION_ERRORS: tuple[type[Exception], ...] = (
+    EOFError,
+    OSError,
+    lzma.LZMAError,
+    zlib.error,
+)
+"""
+The errors reading a file from `open_input` can raise: truncated input
+raises EOFError, corrupt input `gzip.BadGzipFile` (an OSError), OSError,
+`lzma.LZMAError` or `zlib.error`, and a file that cannot be read OSError.
+"""
+
+_MAGIC_SIZE = max(len(i) for i in COMPRESSION_MAGIC)
+
+
+def detect_compression(input_file: str) -> str | None:
+    """Return "gzip", "bz2" or "xz" from the first bytes of a file, else None."""
+    with open(input_file, "rb") as f:
+        head = f.read(_MAGIC_SIZE)
+    for magic, name in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_input(input_file: str) -> BinaryIO:
+    """Open a file for reading bytes, decompressing it if it is compressed.
+
+    Corrupt or truncated compressed data is reported when it is read, by
+    the `gzip`, `bz2` or `lzma` module that decompresses it, with one of
+    the `DECOMPRESSION_ERRORS`.
+
+    Raises:
+        OSError: if the file cannot be opened.
+    """
+    match detect_compression(input_file):
+        case "gzip":
+            return cast(BinaryIO, gzip.open(input_file, "rb"))
+        case "bz2":
+            return cast(BinaryIO, bz2.open(input_file, "rb"))
+        case "xz":
+            return cast(BinaryIO, lzma.open(input_file, "rb"))
+        case _:
+            return open(input_file, "rb")
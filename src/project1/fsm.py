@@ -3,10 +3,14 @@
 The finite state machine (FSM) is abstracted by the `FiniteStateMachine` class.
 The function `run_fsm(fsm, input_string)` runs the indicated `fsm` until it
 accepts or rejects to return the resulting characters read and token.
+`match_fsm` does the same but returns only the characters read, and
+`run_fsms` runs several FSMs together to find the longest match among them.
 """
 
-from typing import Callable
-from project1.token import Token
+import re
+from typing import Callable, ClassVar, NamedTuple, Sequence
+from project1.token import Token, TokenType
+from project1.trace import TraceEvent, TraceSink
 
 
 State = Callable[[int, str], "StateAndOutput"]
@@ -22,32 +26,87 @@ The `State` is the new state resulting from the input while the `int` is the
 new output resulting from the input.
 """
 
+_WHITESPACE_RUN = re.compile(r"[ \t\r\n]+")
+_ASCII_ALNUM_RUN = re.compile(r"[A-Za-z0-9]*")
 
-def run_fsm(fsm: "FiniteStateMachine", input_string: str) -> tuple[int, Token]:
-    """Run an FSM and return the number of characters read with the token.
 
-    Run the passed in FSM until it accepts or rejects. The output is captured
-    on each state transition and passed as input with the next character. It returns
-    the number or character read and the resulting token.
+def _match_traced(
+    fsm: "FiniteStateMachine",
+    input_string: str,
+    start: int,
+    trace: TraceSink,
+    number_of_chars: int,
+) -> int:
+    """The `match_fsm` loop with a `TraceEvent` recorded for every transition."""
+    name = type(fsm).__name__
+    current_state: State = fsm.initial_state
+    output_num_chars_read: int = 0
+
+    for i in range(start, number_of_chars + 1):
+        input_num_chars_read = output_num_chars_read
+        input_char = input_string[i] if i < number_of_chars else ""
+
+        next_state, output_num_chars_read = current_state(
+            input_num_chars_read, input_char
+        )
+        trace.record(
+            TraceEvent(
+                name,
+                current_state.__qualname__,
+                input_char,
+                input_num_chars_read,
+                next_state.__qualname__,
+            )
+        )
+        if next_state in {
+            FiniteStateMachine.s_accept,
+            FiniteStateMachine.s_reject,
+        }:
+            break
+
+        current_state = next_state
+
+    return output_num_chars_read
+
+
+def match_fsm(
+    fsm: "FiniteStateMachine",
+    input_string: str,
+    start: int = 0,
+    trace: TraceSink | None = None,
+    end: int | None = None,
+) -> int:
+    """Run an FSM and return only the number of characters read.
+
+    This is `run_fsm` without building the token: no value is sliced from the
+    input and `fsm.token` is not called. The lexer uses it to find the longest
+    match and to skip hidden tokens without creating them.
+
+    With a `trace` sink every transition is recorded (see `project1.trace`).
+    The choice is made once per run, so the untraced loop is unchanged.
 
     Args:
 
         fsm: the FSM to run
         input_string: the string to use as input
+        start: the index in `input_string` of the first character to read
+        trace: where to record state transitions, if anywhere
+        end: the index to treat as the end of the input, or None for its length
 
     Returns:
 
-        (output_num_chars_read, token): the number of characters read from the input and the associated token produced by the FSM as a tuple
+        output_num_chars_read: the number of characters read from the input
 
     Examples:
 
-        >>> from project1.fsm import run_fsm, Colon
-        >>> colon = Colon()
-        >>> input_string = ": a"
-        >>> number_chars_read, token = run_fsm(colon, input_string)
-        >>> "number_chars_read = {} token = {}".format(number_chars_read, str(token))
-        'number_chars_read = 1 token = (COLON,":",0)'
+        >>> from project1.fsm import match_fsm, WhiteSpace
+        >>> match_fsm(WhiteSpace(), "a \\n\\tb", 1)
+        3
     """
+    number_of_chars = len(input_string) if end is None else end
+    if trace is not None:
+        return _match_traced(fsm, input_string, start, trace, number_of_chars)
+
     current_state: State = fsm.initial_state
     next_state: State
 
@@ -56,8 +115,7 @@ def run_fsm(fsm: "FiniteStateMachine", input_string: str) -> tuple[int, Token]:
     input_num_chars_read: int = 0
     input_char: str = ""
 
-    number_of_chars = len(input_string)
-    for i in range(0, number_of_chars + 1):
+    for i in range(start, number_of_chars + 1):
         input_num_chars_read = output_num_chars_read
         input_char = input_string[i] if i < number_of_chars else ""
 
@@ -72,10 +130,169 @@ def run_fsm(fsm: "FiniteStateMachine", input_string: str) -> tuple[int, Token]:
 
         current_state = next_state
 
-    value = input_string[:output_num_chars_read]
+    return output_num_chars_read
+
+
+def run_fsm(
+    fsm: "FiniteStateMachine",
+    input_string: str,
+    start: int = 0,
+    trace: TraceSink | None = None,
+) -> tuple[int, Token]:
+    """Run an FSM and return the number of characters read with the token.
+
+    Run the passed in FSM until it accepts or rejects. The output is captured
+    on each state transition and passed as input with the next character. It returns
+    the number or character read and the resulting token.
+
+    The FSM reads from index `start` so that a lexer can walk through its input
+    without copying what is left of it for every token.
+
+    Args:
+
+        fsm: the FSM to run
+        input_string: the string to use as input
+        start: the index in `input_string` of the first character to read
+        trace: where to record state transitions, if anywhere
+
+    Returns:
+
+        (output_num_chars_read, token): the number of characters read from the input and the associated token produced by the FSM as a tuple
+
+    Examples:
+
+        >>> from project1.fsm import run_fsm, Colon
+        >>> colon = Colon()
+        >>> input_string = ": a"
+        >>> number_chars_read, token = run_fsm(colon, input_string)
+        >>> "number_chars_read = {} token = {}".format(number_chars_read, str(token))
+        'number_chars_read = 1 token = (COLON,":",0)'
+        >>> run_fsm(colon, "a:", 1)[0]
+        1
+    """
+    output_num_chars_read = match_fsm(fsm, input_string, start, trace)
+    value = input_string[start : start + output_num_chars_read]
     return (output_num_chars_read, fsm.token(value))
 
 
+class LockstepPlan(NamedTuple):
+    """How `run_fsms` runs a sequence of FSMs, from `lockstep_plan`.
+
+    Attributes:
+        bulk (tuple[tuple[int, FiniteStateMachine], ...]): The FSMs with a
+            bulk `match`, each with its index.
+        stepped (tuple[tuple[int, State], ...]): The initial states of the
+            FSMs to step together, each with its index.
+    """
+
+    bulk: "tuple[tuple[int, FiniteStateMachine], ...]"
+    stepped: "tuple[tuple[int, State], ...]"
+
+
+def lockstep_plan(fsms: "Sequence[FiniteStateMachine]") -> LockstepPlan:
+    """Split `fsms` into those with a bulk `match` and those to step together.
+
+    Each FSM keeps its index in `fsms` so ties go to the earliest one. A
+    caller that runs the same FSMs for every token makes the plan once and
+    passes it to `run_fsms`, as the lexer does for its `FSMS`.
+    """
+    bulk = tuple(
+        (i, fsm)
+        for i, fsm in enumerate(fsms)
+        if type(fsm).match is not FiniteStateMachine.match
+    )
+    stepped = tuple(
+        (i, fsm.initial_state)
+        for i, fsm in enumerate(fsms)
+        if type(fsm).match is FiniteStateMachine.match
+    )
+    return LockstepPlan(bulk, stepped)
+
+
+def run_fsms(
+    fsms: "Sequence[FiniteStateMachine]",
+    input_string: str,
+    start: int = 0,
+    end: int | None = None,
+    plan: LockstepPlan | None = None,
+) -> "tuple[FiniteStateMachine | None, int]":
+    """Return the FSM with the longest match at `start` and its length.
+
+    The FSMs are run in lockstep: each character is read once and passed to
+    every FSM still running, an FSM is dropped as soon as it accepts or
+    rejects, and the run stops when none is left. A keyword FSM that rejects
+    after two characters of a long identifier therefore costs two steps, and
+    no FSM reads past the point where the last one stopped. FSMs that
+    override `FiniteStateMachine.match` are matched in bulk first instead.
+
+    Each FSM reads exactly what `match_fsm` would read, so the result is the
+    same as running them one at a time, works for any subclass built from
+    state functions, and breaks ties for the longest match in favour of the
+    FSM that comes first in `fsms`.
+
+    Args:
+
+        fsms: the FSMs to run, in priority order for ties
+        input_string: the string to use as input
+        start: the index in `input_string` of the first character to read
+        end: the index to treat as the end of the input, or None for its length
+        plan: `lockstep_plan(fsms)`, or None to make it for this call
+
+    Returns:
+
+        (fsm, output_num_chars_read): the first FSM with the longest match and its length, or (None, 0) if none reads a character
+
+    Examples:
+
+        >>> from project1.fsm import run_fsms, Colon, ColonDash, ID, Schemes
+        >>> fsm, length = run_fsms([Colon(), ColonDash()], "a :-", 2)
+        >>> type(fsm).__name__, length
+        ('ColonDash', 2)
+        >>> fsm, length = run_fsms([Schemes(), ID()], "Schemes")
+        >>> type(fsm).__name__, length
+        ('Schemes', 7)
+        >>> run_fsms([Colon()], "!")
+        (None, 0)
+    """
+    bulk, stepped = lockstep_plan(fsms) if plan is None else plan
+    number_of_chars = len(input_string) if end is None else end
+    best_index = -1
+    best_length = 0
+
+    for index, fsm in bulk:
+        length = fsm.match(input_string, start, number_of_chars)
+        if length > best_length:
+            best_index, best_length = index, length
+
+    running: list[tuple[int, State, int]] = [(i, state, 0) for i, state in stepped]
+    done = (FiniteStateMachine.s_accept, FiniteStateMachine.s_reject)
+    for i in range(start, number_of_chars + 1):
+        input_char = input_string[i] if i < number_of_chars else ""
+        still_running: list[tuple[int, State, int]] = []
+        for index, state, chars_read in running:
+            next_state, chars_read = state(chars_read, input_char)
+            if next_state not in done:
+                still_running.append((index, next_state, chars_read))
+            elif chars_read > best_length or (
+                chars_read == best_length and 0 < chars_read and index < best_index
+            ):
+                best_index, best_length = index, chars_read
+        running = still_running
+        if not running:
+            break
+
+    # An FSM still running at the end of the input returns what it has read.
+    for index, _, chars_read in running:
+        if chars_read > best_length or (
+            chars_read == best_length and 0 < chars_read and index < best_index
+        ):
+            best_index, best_length = index, chars_read
+
+    if best_index < 0:
+        return None, 0
+    return fsms[best_index], best_length
+
+
 class FiniteStateMachine:
     """Base class for the finite state machine (FSM) abstraction.
 
@@ -84,12 +301,21 @@ class FiniteStateMachine:
     accept/reject. The output does not change once in these states. The
     `token` function should be overridden in each subclass.
 
+    An FSM keeps no state of its own between or during runs: the current
+    state and the characters read live in `match_fsm`, and anything else a
+    subclass needs is a constant class attribute. One instance can therefore
+    be shared by any number of threads lexing at the same time.
+
     Attributes:
         initial_state (State): The initial state for this FSM.
+        token_type (TokenType): The type of token produced on accept. The lexer
+            checks it to skip hidden tokens without calling `token`.
     """
 
     __slots__ = ["initial_state"]
 
+    token_type: ClassVar[TokenType] = TokenType.UNDEFINED
+
     def __init__(self, initial_state: State) -> None:
         """Initialize the FSM with its initial state
 
@@ -98,6 +324,18 @@ class FiniteStateMachine:
         """
         self.initial_state = initial_state
 
+    def match(self, input_string: str, start: int = 0, end: int | None = None) -> int:
+        """Return the number of characters this FSM reads from `start`.
+
+        This is `match_fsm(self, input_string, start, end=end)`. FSMs whose
+        tokens are simple runs of characters override it to find the end of
+        the run in bulk rather than with one state call per character. An
+        override must return exactly what `match_fsm` would, reading nothing
+        at or past `end`; the lexer uses `match` unless it is tracing, when it
+        steps the states with `match_fsm`.
+        """
+        return match_fsm(self, input_string, start, end=end)
+
     def token(self, value: str) -> Token:
         """Return the token produced by this FSM
 
@@ -123,6 +361,8 @@ class FiniteStateMachine:
 
 
 class Colon(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.COLON
+
     def __init__(self) -> None:
         super().__init__(Colon.s_0)
 
@@ -153,6 +393,8 @@ class Colon(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class ColonDash(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.COLON_DASH
+
     def __init__(self) -> None:
         super().__init__(ColonDash.s_0)
 
@@ -178,6 +420,8 @@ class ColonDash(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class Schemes(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.SCHEMES
+
     def __init__(self) -> None:
         super().__init__(Schemes.s_0)
 
@@ -238,6 +482,8 @@ class Schemes(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class Facts(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.FACTS
+
     def __init__(self) -> None:
         super().__init__(Facts.s_0)
 
@@ -284,6 +530,8 @@ class Facts(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class Rules(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.RULES
+
     def __init__(self) -> None:
         super().__init__(Rules.s_0)
 
@@ -330,6 +578,8 @@ class Rules(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class Queries(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.QUERIES
+
     def __init__(self) -> None:
         super().__init__(Queries.s_0)
 
@@ -390,6 +640,8 @@ class Queries(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
 
 class Comma(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.COMMA
+
     def __init__(self) -> None:
         super().__init__(Comma.s_0)
 
@@ -408,6 +660,8 @@ class Comma(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class Period(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.PERIOD
+
     def __init__(self) -> None:
         super().__init__(Period.s_0)
 
@@ -426,6 +680,8 @@ class Period(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class Q_mark(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.Q_MARK
+
     def __init__(self) -> None:
         super().__init__(Q_mark.s_0)
 
@@ -444,6 +700,8 @@ class Q_mark(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
         
 class Left_Paren(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.LEFT_PAREN
+
     def __init__(self) -> None:
         super().__init__(Left_Paren.s_0)
 
@@ -462,6 +720,8 @@ class Left_Paren(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
 
 class Right_Paren(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.RIGHT_PAREN
+
     def __init__(self) -> None:
         super().__init__(Right_Paren.s_0)
 
@@ -480,6 +740,8 @@ class Right_Paren(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
 
 class Eof(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.EOF
+
     def __init__(self) -> None:
         super().__init__(Eof.s_0)
 
@@ -498,9 +760,32 @@ class Eof(FiniteStateMachine):
             return FiniteStateMachine.s_reject, 0
 
 class ID(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.ID
+    keywords: ClassVar[frozenset[str]] = frozenset(
+        ["Schemes", "Facts", "Rules", "Queries"]
+    )
+
     def __init__(self) -> None:
         super().__init__(ID.s_0)
-        self.keywords = {"Schemes", "Facts", "Rules", "Queries"}
+
+    def match(self, input_string: str, start: int = 0, end: int | None = None) -> int:
+        """Match ASCII letters and digits with `_ASCII_ALNUM_RUN`.
+
+        A run only stops at a character outside `[A-Za-z0-9]`, which is then
+        checked with `str.isalnum` exactly as `s_1` does, so non-ASCII letters
+        and digits are read the same way the states read them.
+        """
+        number_of_chars = len(input_string) if end is None else end
+        if start >= number_of_chars or not input_string[start].isalpha():
+            return 0
+        position = start + 1
+        while True:
+            run = _ASCII_ALNUM_RUN.match(input_string, position, number_of_chars)
+            assert run is not None
+            position = run.end()
+            if position >= number_of_chars or not input_string[position].isalnum():
+                return position - start
+            position += 1
 
     def token(self, value: str) -> Token:
         if value in self.keywords:
@@ -522,9 +807,27 @@ class ID(FiniteStateMachine):
             return FiniteStateMachine.s_accept, input_chars_read
         
 class String(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.STRING
+
     def __init__(self) -> None:
         super().__init__(String.s_0)
-        self.start_line = 0
+
+    def match(self, input_string: str, start: int = 0, end: int | None = None) -> int:
+        """Find the closing quote with `str.find`, stepping over each "''".
+
+        A string with no closing quote reads nothing, as in `s_1`.
+        """
+        number_of_chars = len(input_string) if end is None else end
+        if not input_string.startswith("'", start, number_of_chars):
+            return 0
+        position = start + 1
+        while True:
+            quote = input_string.find("'", position, number_of_chars)
+            if quote == -1:
+                return 0
+            if not input_string.startswith("'", quote + 1, number_of_chars):
+                return quote + 1 - start
+            position = quote + 2
 
     def token(self, value: str) -> Token:
         return Token.string(value)
@@ -557,10 +860,19 @@ class String(FiniteStateMachine):
         return FiniteStateMachine.s_reject, 0
         
 class Comment(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.COMMENT
 
     def __init__(self) -> None:
         super().__init__(Comment.s_0)
 
+    def match(self, input_string: str, start: int = 0, end: int | None = None) -> int:
+        """Find the end of the line with `str.find`."""
+        number_of_chars = len(input_string) if end is None else end
+        if not input_string.startswith("#", start, number_of_chars):
+            return 0
+        newline = input_string.find("\n", start, number_of_chars)
+        return (newline if newline != -1 else number_of_chars) - start
+
     def token(self, value: str) -> Token:
         return Token.comment(value)
 
@@ -579,9 +891,17 @@ class Comment(FiniteStateMachine):
             return Comment.s_1, input_chars_read + 1
 
 class WhiteSpace(FiniteStateMachine):
+    token_type: ClassVar[TokenType] = TokenType.WHITESPACE
+
     def __init__(self) -> None:
         super().__init__(WhiteSpace.s_0)
 
+    def match(self, input_string: str, start: int = 0, end: int | None = None) -> int:
+        """Match the whole run with `_WHITESPACE_RUN`."""
+        number_of_chars = len(input_string) if end is None else end
+        run = _WHITESPACE_RUN.match(input_string, start, number_of_chars)
+        return run.end() - start if run else 0
+
     def token(self, value: str) -> Token:
         return Token.whitespace(value)
 
@@ -1,44 +1,327 @@
-from typing import Iterator, List
+import re
+from typing import Collection, Iterator, Sequence
 
+from project1.limits import (
+    NO_LIMITS,
+    Budget,
+    LexLimits,
+    check_input_size,
+    token_too_long,
+)
+from project1.symbols import SymbolTable
 from project1.token import Token, TokenType
-from project1.fsm import FiniteStateMachine, Colon, Eof, WhiteSpace, run_fsm, Comma, Period, Q_mark, Left_Paren, Right_Paren, ColonDash, Comment, Schemes, String, Rules, Queries, Facts, ID
+from project1.trace import TraceSink
+from project1.fsm import FiniteStateMachine, Colon, Eof, WhiteSpace, match_fsm, lockstep_plan, run_fsms, Comma, Period, Q_mark, Left_Paren, Right_Paren, ColonDash, Comment, Schemes, String, Rules, Queries, Facts, ID
 
-def _is_last_token(token: Token) -> bool:
-    return token.token_type == "EOF"
+DEFAULT_HIDDEN: frozenset[TokenType] = frozenset([TokenType.WHITESPACE])
+"""The token types the lexer skips unless told otherwise."""
 
-def _get_new_lines(value: str) -> int:
-    return value.count("\n")
+FSMS: tuple[FiniteStateMachine, ...] = (Colon(), Eof(), WhiteSpace(), Comma(), Period(), Q_mark(), Left_Paren(), Right_Paren(), ColonDash(), Comment(), Schemes(), String(), Rules(), Queries(), Facts(), ID())
+"""
+The FSMs the lexer runs, in priority order for ties. FSMs are stateless, so
+this one tuple is shared by every call to the lexer in every thread.
+"""
+
+_FSM_BY_TYPE: dict[TokenType, FiniteStateMachine] = {i.token_type: i for i in FSMS}
+
+_FSMS_PLAN = lockstep_plan(FSMS)
+"""How `run_fsms` runs `FSMS`, made once rather than for every token."""
+
+_SECTION_TYPES: frozenset[TokenType] = frozenset(
+    [TokenType.SCHEMES, TokenType.FACTS, TokenType.RULES, TokenType.QUERIES]
+)
+
+_FACT_STRING = r"'(?:[^'\n]|'')*+'(?!')"
+_FACT = re.compile(
+    r"([A-Za-z][A-Za-z0-9]*)\({s}(?:,{s})*\)\.".format(s=_FACT_STRING)
+)
+_FACT_SPACED = re.compile(
+    r"([A-Za-z][A-Za-z0-9]*)\([ \t]*{s}(?:[ \t]*,[ \t]*{s})*[ \t]*\)[ \t]*\.".format(
+        s=_FACT_STRING
+    )
+)
+"""
+A whole ground fact such as `snap('1','it''s').` on one line, with spaces
+and tabs allowed between its tokens. `_FACT` is the same without spaces,
+for when WHITESPACE tokens are not hidden.
+"""
+_FACT_PARTS = re.compile(r"[A-Za-z][A-Za-z0-9]*|{}|[(),.]".format(_FACT_STRING))
+_FACT_PART_TYPES: dict[str, TokenType] = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    ",": TokenType.COMMA,
+    ".": TokenType.PERIOD,
+    "'": TokenType.STRING,
+}
+
+def _hidden_types(hidden: Collection[TokenType | str]) -> frozenset[TokenType]:
+    """Return `hidden` as a set of token types, looking up any names.
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED or is not a token type.
+    """
+    hidden_types = frozenset(TokenType.of(i) for i in hidden)
+    if TokenType.EOF in hidden_types or TokenType.UNDEFINED in hidden_types:
+        raise ValueError("EOF and UNDEFINED tokens cannot be hidden")
+    return hidden_types
+
+def _get_match(
+    input_string: str,
+    fsms: Sequence[FiniteStateMachine],
+    start: int,
+    trace: TraceSink | None = None,
+    end: int | None = None,
+) -> tuple[FiniteStateMachine | None, int]:
+    if trace is None:
+        plan = _FSMS_PLAN if fsms is FSMS else None
+        return run_fsms(fsms, input_string, start, end, plan)
+
+    longest_match: FiniteStateMachine | None = None
+    longest_length: int = 0
+
+    for fsm in fsms:
+        num_chars_read = match_fsm(fsm, input_string, start, trace, end)
 
-def _get_token(input_string: str, fsms: List[FiniteStateMachine]) -> Token:
-     longest_match: Token = Token.undefined("") 
-     longest_length: int = 0
-    
-     for fsm in fsms:
-        num_chars_read, token = run_fsm(fsm, input_string)
-        
         if num_chars_read > longest_length:
             longest_length = num_chars_read
-            longest_match = token
-            
-    # If no FSM matches the input, return an undefined token with the first character
-     if longest_length == 0:
-        return Token.undefined(input_string[0])
+            longest_match = fsm
+
+    # If no FSM matches the input, the caller makes an undefined token with the first character
+    return longest_match, longest_length
+
+Span = tuple[TokenType, int, int, int]
+"""
+A token as `(token_type, start, end, line_num)` where `start` and `end` index
+the token value in the input, so the value is `input_string[start:end]`.
+"""
+
+def _resync(input_string: str, start: int) -> int:
+    """Return the index to resume lexing from after an UNDEFINED token at `start`.
+
+    A lone "'" is an unterminated string, so the rest of its line is skipped
+    rather than lexed as if it were outside a string. Anything else skips
+    just the offending character. The newline itself is kept so that line
+    numbers stay correct.
+    """
+    if input_string[start] == "'":
+        end = input_string.find("\n", start)
+        return end if end != -1 else len(input_string)
+    return start + 1
+
+def _scan(
+    input_string: str,
+    recover: bool,
+    hidden_types: frozenset[TokenType],
+    trace: TraceSink | None,
+    final: bool = True,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[tuple[FiniteStateMachine | None, int, int, int]]:
+    """Yield `(fsm, start, end, line_num)` for each token that is not hidden.
+
+    `fsm` is the winning FSM, or None for an UNDEFINED character. Nothing is
+    sliced from the input and no `Token` is created. An FSM that makes an
+    UNDEFINED token from its value is resumed after, like any other token.
+
+    When `final` is False more input follows `input_string`, and scanning
+    stops without a yield at the first token that more input could change:
+    one that reaches the end of `input_string`, or a "'" with no closing
+    quote yet. EOF is never yielded.
 
-     return longest_match
+    Inside a Facts section, from a FACTS token to the next SCHEMES, RULES or
+    QUERIES token, each position is first tried against the whole fact
+    pattern `_FACT_SPACED`. A match is split into its tokens in one step
+    without running any FSM; anything else goes through the FSMs as usual.
+    Both give the same tokens. The fast path is off while tracing.
 
-def lexer(input_string: str) -> Iterator[Token]:
-    fsms: list[FiniteStateMachine] = [Colon(), Eof(), WhiteSpace(), Comma(), Period(), Q_mark(),Left_Paren(), Right_Paren(), ColonDash(), Comment(), Schemes(), String(), Rules(), Queries(), Facts(), ID()]
-    hidden: list[TokenType] = ["WHITESPACE"]
+    With a `max_token_length` in `limits`, no FSM reads more than one
+    character past that length (see `project1.limits`).
+    """
+    size = len(input_string)
+    if limits.max_input_bytes is not None:
+        check_input_size(
+            size if input_string.isascii() else len(input_string.encode("utf-8")),
+            limits,
+        )
+    max_length = limits.max_token_length
+    budget = (
+        None
+        if limits.max_steps is None and limits.max_seconds is None
+        else Budget(limits)
+    )
+    fsms = FSMS
+    fsm_by_type = _FSM_BY_TYPE
+    keywords = ID.keywords
+    fact = _FACT_SPACED if TokenType.WHITESPACE in hidden_types else _FACT
+    id_type = TokenType.ID
+    facts_type = TokenType.FACTS
+    eof_type = TokenType.EOF
+    in_facts = False
     line_num: int = 1
-    token: Token = Token.undefined("")
-    while not _is_last_token(token):
-        token = _get_token(input_string, fsms)
-        token.line_num = line_num
-        line_num = line_num + _get_new_lines(token.value)
-        input_string = input_string.removeprefix(token.value)
-        if token.token_type == "UNDEFINED":
-            yield token
-            return 
-        if token.token_type in hidden:
+    position: int = 0
+    bound = size
+    while True:
+        if max_length is not None:
+            bound = min(size, position + max_length + 1)
+        if in_facts and trace is None:
+            match = fact.match(input_string, position, bound)
+            if match is not None and match.group(1) not in keywords:
+                end = match.end()
+                parts = 0
+                for part in _FACT_PARTS.finditer(input_string, position, end):
+                    token_type = _FACT_PART_TYPES.get(part.group()[0], id_type)
+                    if token_type not in hidden_types:
+                        yield fsm_by_type[token_type], part.start(), part.end(), line_num
+                    parts += 1
+                if budget is not None:
+                    budget.step(position, line_num, parts)
+                position = end
+                continue
+        if budget is not None:
+            budget.step(position, line_num)
+        fsm, length = _get_match(input_string, fsms, position, trace, bound)
+        if max_length is not None and (
+            length > max_length
+            or (bound < size and fsm is None and input_string[position] == "'")
+        ):
+            raise token_too_long(limits, position, line_num)
+        if not final and (
+            position + length >= size
+            or (fsm is None and input_string[position] == "'")
+        ):
+            return
+        if fsm is None:
+            yield None, position, position + 1, line_num
+            if not recover:
+                return
+            position = _resync(input_string, position)
             continue
+        end = position + length
+        if fsm.token_type in _SECTION_TYPES:
+            in_facts = fsm.token_type is facts_type
+        if fsm.token_type in hidden_types:
+            line_num = line_num + input_string.count("\n", position, end)
+            position = end
+            continue
+        if fsm.token_type is eof_type:
+            yield fsm, position, position, line_num
+            return
+        yield fsm, position, end, line_num
+        line_num = line_num + input_string.count("\n", position, end)
+        position = end
+
+def scan(
+    input_string: str,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    trace: TraceSink | None = None,
+    final: bool = True,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[Span]:
+    """Yield the tokens for `input_string` as spans rather than `Token` objects.
+
+    This runs the same matching as `lexer` but never slices a value out of the
+    input or builds a token. The type of each span is the `token_type` of the
+    FSM that matched it, or UNDEFINED when none did.
+
+    Args:
+        input_string: The string to tokenize.
+        recover: Keep lexing after an UNDEFINED token.
+        hidden: The token types to leave out of the output.
+        trace: Where to record the state transitions of every FSM run (see `project1.trace`).
+        final: False if more input follows, to stop before the first token
+            that is not complete yet rather than end with EOF.
+        limits: The limits on input size, token length, steps and time.
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED.
+        LexLimitError: if lexing goes over one of `limits` (see `project1.limits`).
+
+    Examples:
+        >>> from project1.lexer import scan
+        >>> [(i.name, start, end, line) for i, start, end, line in scan("a :-")]
+        [('ID', 0, 1, 1), ('COLON_DASH', 2, 4, 1), ('EOF', 4, 4, 1)]
+    """
+    undefined = TokenType.UNDEFINED
+    for fsm, start, end, line_num in _scan(
+        input_string, recover, _hidden_types(hidden), trace, final, limits
+    ):
+        yield (fsm.token_type if fsm else undefined), start, end, line_num
+
+def lexer(
+    input_string: str,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    trace: TraceSink | None = None,
+    symbols: SymbolTable | None = None,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[Token]:
+    """Yield the tokens for `input_string` ending with EOF.
+
+    By default lexing stops at the first UNDEFINED token, which is the last
+    token yielded. With `recover` set, each UNDEFINED token is yielded in
+    place, the lexer resynchronizes past it (see `_resync`), and lexing goes
+    on to EOF so that one pass reports every error.
+
+    The lexer keeps an index into `input_string` rather than cutting off each
+    token as it is read, so the work per token does not grow with the input.
+    All of its state is local to the call, so any number of threads can lex
+    at once; only a `trace` sink passed to several calls is shared.
+    Tokens of a type in `hidden` are skipped as soon as their FSM wins: the
+    lexer only counts the newlines they span, and never slices their value or
+    creates a `Token` for them.
+
+    Args:
+        input_string: The string to tokenize.
+        recover: Keep lexing after an UNDEFINED token.
+        hidden: The token types to leave out of the output.
+        trace: Where to record the state transitions of every FSM run (see `project1.trace`).
+        symbols: The table to intern ID and STRING values in (see `project1.symbols`).
+        limits: The limits on input size, token length, steps and time.
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED.
+        LexLimitError: if lexing goes over one of `limits` (see `project1.limits`).
+
+    Examples:
+        >>> from project1.lexer import lexer
+        >>> [str(i) for i in lexer("!:")]
+        ['(UNDEFINED,"!",1)']
+        >>> [str(i) for i in lexer("!:\\n'oops", recover=True)]
+        ['(UNDEFINED,"!",1)', '(COLON,":",1)', '(UNDEFINED,"\\'",2)', '(EOF,"",2)']
+        >>> [str(i) for i in lexer("# note\\n:", hidden=["WHITESPACE", "COMMENT"])]
+        ['(COLON,":",2)', '(EOF,"",2)']
+    """
+    undefined = TokenType.UNDEFINED
+    for fsm, start, end, line_num in _scan(
+        input_string, recover, _hidden_types(hidden), trace, True, limits
+    ):
+        if fsm is None:
+            token = Token.undefined(input_string[start]).at_line(line_num)
+        else:
+            token = fsm.token(input_string[start:end]).at_line(line_num)
+        if symbols is not None:
+            token = symbols.attach(token)
         yield token
+        if token.token_type is undefined and not recover:
+            return
+
+def lex_errors(input_string: str) -> tuple[list[Token], list[Token]]:
+    """Lex `input_string` in recovery mode in a single pass.
+
+    Args:
+        input_string: The string to tokenize.
+
+    Returns:
+        (tokens, errors): the best-effort token stream, UNDEFINED tokens included, and the UNDEFINED tokens alone.
+
+    Examples:
+        >>> from project1.lexer import lex_errors
+        >>> tokens, errors = lex_errors("!\\n:@")
+        >>> [str(i) for i in errors]
+        ['(UNDEFINED,"!",1)', '(UNDEFINED,"@",2)']
+        >>> len(tokens)
+        4
+    """
+    tokens = list(lexer(input_string, recover=True))
+    errors = [i for i in tokens if i.token_type is TokenType.UNDEFINED]
+    return tokens, errors
@@ -0,0 +1,159 @@
+"""Resource limits that bound the work and memory of one lexer call.
+
+A shared service cannot let one request tie up a worker: a huge input, a
+single giant token such as a string that is never closed, or input that is
+slow to lex. `LexLimits` caps each of these, and `lexer`, `lexer_bytes`,
+`scan`, `scan_bytes` and `project1cli` all accept one. Going over a limit
+raises a `LexLimitError` subclass that records where lexing stopped:
+
+    `InputTooLargeError`: the input is longer than `max_input_bytes`.
+    `TokenTooLongError`: a token, hidden ones included, is longer than
+        `max_token_length`, or a string is not closed within that length.
+    `LexBudgetError`: lexing took more than `max_steps` tokens or
+        `max_seconds` of wall-clock time.
+
+Token length is bounded while matching: no FSM reads more than
+`max_token_length + 1` characters for a token, so an unterminated string
+costs no more than a long one.
+
+Examples:
+    >>> from project1.lexer import lexer
+    >>> from project1.limits import LexLimits, TokenTooLongError
+    >>> try:
+    ...     list(lexer("a\\n'" + "x" * 100, limits=LexLimits(max_token_length=64)))
+    ... except TokenTooLongError as e:
+    ...     print(e, e.position, e.line_num)
+    token longer than 64 characters at position 2 on line 2 2 2
+"""
+
+import time
+from typing import NamedTuple
+
+
+class LexLimits(NamedTuple):
+    """The limits for one lexer call. None means no limit.
+
+    Attributes:
+        max_input_bytes (int | None): The largest input, in bytes (UTF-8 for a `str`).
+        max_token_length (int | None): The longest token, in characters (bytes for `bytes`).
+        max_steps (int | None): The most tokens to scan, hidden ones included.
+        max_seconds (float | None): The most wall-clock time to spend lexing.
+    """
+
+    max_input_bytes: int | None = None
+    max_token_length: int | None = None
+    max_steps: int | None = None
+    max_seconds: float | None = None
+
+
+NO_LIMITS = LexLimits()
+"""Limits that are never exceeded, the default everywhere."""
+
+
+class LexLimitError(Exception):
+    """Raised when lexing goes over one of its `LexLimits`.
+
+    Attributes:
+        position (int): The index in the input of the token being lexed.
+        line_num (int): The line of that position.
+        limit (int | float): The limit that was exceeded.
+    """
+
+    def __init__(
+        self, message: str, position: int, line_num: int, limit: int | float
+    ) -> None:
+        super().__init__(
+            "{} at position {} on line {}".format(message, position, line_num)
+        )
+        self.position = position
+        self.line_num = line_num
+        self.limit = limit
+
+
+class InputTooLargeError(LexLimitError):
+    """The input is longer than `LexLimits.max_input_bytes`.
+
+    The position is the limit itself, the first byte past what is allowed.
+    """
+
+
+class TokenTooLongError(LexLimitError):
+    """A token is longer than `LexLimits.max_token_length`."""
+
+
+class LexBudgetError(LexLimitError):
+    """Lexing used up `LexLimits.max_steps` or `LexLimits.max_seconds`."""
+
+
+def check_input_size(size: int, limits: LexLimits) -> None:
+    """Raise `InputTooLargeError` if `size` bytes is over the input limit."""
+    if limits.max_input_bytes is not None and size > limits.max_input_bytes:
+        raise InputTooLargeError(
+            "input of {} bytes is larger than {}".format(size, limits.max_input_bytes),
+            limits.max_input_bytes,
+            1,
+            limits.max_input_bytes,
+        )
+
+
+def token_too_long(
+    limits: LexLimits, position: int, line_num: int
+) -> TokenTooLongError:
+    """Return the error for a token at `position` that is over the length limit."""
+    assert limits.max_token_length is not None
+    return TokenTooLongError(
+        "token longer than {} characters".format(limits.max_token_length),
+        position,
+        line_num,
+        limits.max_token_length,
+    )
+
+
+_CLOCK_STEPS = 256
+
+
+class Budget:
+    """Counts the tokens scanned against the step and time limits.
+
+    The scanners call `step` once per token. The clock is read only every
+    256 steps, so the time limit costs next to nothing and may be overrun by
+    the time it takes to scan that many tokens.
+    """
+
+    __slots__ = ["_limits", "_max_steps", "_deadline", "_next_clock", "steps"]
+
+    def __init__(self, limits: LexLimits) -> None:
+        self._limits = limits
+        self._max_steps = limits.max_steps
+        self._deadline = (
+            None
+            if limits.max_seconds is None
+            else time.monotonic() + limits.max_seconds
+        )
+        self._next_clock = _CLOCK_STEPS
+        self.steps = 0
+
+    def step(self, position: int, line_num: int, count: int = 1) -> None:
+        """Count `count` tokens at `position`.
+
+        Raises:
+            LexBudgetError: if either the step or the time limit is used up.
+        """
+        self.steps += count
+        if self._max_steps is not None and self.steps > self._max_steps:
+            raise LexBudgetError(
+                "more than {} steps".format(self._max_steps),
+                position,
+                line_num,
+                self._max_steps,
+            )
+        if self._deadline is not None and self.steps >= self._next_clock:
+            self._next_clock = self.steps + _CLOCK_STEPS
+            if time.monotonic() > self._deadline:
+                assert self._limits.max_seconds is not None
+                raise LexBudgetError(
+                    "more than {} seconds".format(self._limits.max_seconds),
+                    position,
+                    line_num,
+                    self._limits.max_seconds,
+                )
@@ -0,0 +1,238 @@
+"""Streaming lexer and a threaded read, lex and write pipeline.
+
+`lex_chunks` lexes input that arrives in pieces, such as blocks read from a
+file, and yields exactly the tokens `lexer` yields for the whole input. Each
+piece is scanned with `final=False` (see `project1.lexer.scan`), so a token
+that runs up to the end of what has arrived so far is held back until the
+next piece shows where it ends.
+
+`run_pipeline` overlaps input, lexing and output. A reader thread pulls
+chunks from the source, the calling thread lexes and formats them, and a
+writer thread drains the formatted text to the output. Bounded queues sit
+between the stages, so a slow reader stalls the lexer, a slow writer stalls
+the lexer and the reader in turn, and memory stays bounded by the queue
+depths rather than the input size.
+
+Examples:
+    >>> from project1.pipeline import lex_chunks
+    >>> [str(i) for i in lex_chunks(["Fa", "cts: 'it'", "'s'\\n"])]
+    ['(FACTS,"Facts",1)', '(COLON,":",1)', '(STRING,"\\'it\\'\\'s\\'",1)', '(EOF,"",2)']
+"""
+
+import locale
+import threading
+from io import TextIOWrapper
+from queue import Empty, Full, Queue
+from typing import (
+    Callable,
+    Collection,
+    Generator,
+    Iterable,
+    Iterator,
+    TextIO,
+    TypeVar,
+)
+
+from project1.ascii_lexer import scan_bytes
+from project1.compressed import open_input
+from project1.lexer import DEFAULT_HIDDEN, Span, _hidden_types, scan
+from project1.token import Token, TokenType
+
+CHUNK_SIZE = 1 << 16
+"""The number of characters `read_chunks` reads at a time."""
+
+QUEUE_DEPTH = 8
+"""The number of chunks or output batches each queue in `run_pipeline` holds."""
+
+_BATCH_LINES = 1024
+_POLL_SECONDS = 0.1
+
+_T = TypeVar("_T")
+
+
+def _spans(buffer: str, recover: bool, final: bool) -> Iterator[Span]:
+    if buffer.isascii():
+        return scan_bytes(buffer.encode("ascii"), recover, (), final)
+    return scan(buffer, recover, (), final=final)
+
+
+def lex_chunks(
+    chunks: Iterable[str],
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    first_line: int = 1,
+) -> Iterator[Token]:
+    """Yield the tokens for the concatenation of `chunks` ending with EOF.
+
+    Only the text after the last complete token is kept between chunks. All
+    ASCII text is scanned with the `project1.ascii_lexer` fast path. If no
+    token completes in a chunk, as inside a long comment or string, the text
+    is not scanned again until it has doubled, so a token spanning many
+    chunks still costs time linear in its length.
+
+    Args:
+        chunks: The input in order, split anywhere.
+        recover: Keep lexing after an UNDEFINED token.
+        hidden: The token types to leave out of the output.
+        first_line: The line number of the first chunk, for input that
+            starts part way through a file (see `project1.checkpoints`).
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED.
+    """
+    hidden_types = _hidden_types(hidden)
+    undefined = TokenType.UNDEFINED
+    source = iter(chunks)
+    buffer = ""
+    line_base = first_line - 1
+    rescan_at = 0
+    final = False
+    while not final:
+        chunk = next(source, None)
+        if chunk is None:
+            final = True
+        else:
+            buffer += chunk
+            if len(buffer) < rescan_at:
+                continue
+
+        consumed = 0
+        for token_type, start, end, line_num in _spans(buffer, recover, final):
+            consumed = end
+            if token_type in hidden_types:
+                continue
+            yield Token(token_type, buffer[start:end], line_base + line_num)
+            if token_type is undefined and not recover:
+                return
+
+        line_base += buffer.count("\n", 0, consumed)
+        buffer = buffer[consumed:]
+        rescan_at = 2 * len(buffer) if consumed == 0 else 0
+
+
+def read_chunks(
+    input_file: str, chunk_size: int = CHUNK_SIZE, offset: int = 0
+) -> Generator[str, None, None]:
+    """Yield the text of a file `chunk_size` characters at a time.
+
+    The file is decoded and its newlines translated as `open(input_file,
+    "r")` would, so the chunks join to what `project1cli` lexes. A gzip, bz2
+    or xz file is decompressed as it is read (see `project1.compressed`).
+    Reading starts `offset` bytes into the (decompressed) file, which must
+    be the start of a character.
+    """
+    with TextIOWrapper(
+        open_input(input_file), encoding=locale.getpreferredencoding(False)
+    ) as f:
+        if offset:
+            f.buffer.seek(offset)
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _put(queue: "Queue[_T]", item: _T, stop: threading.Event) -> bool:
+    """Put `item` unless `stop` is set first. Return whether it was put."""
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=_POLL_SECONDS)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _drain(queue: "Queue[_T | None]") -> Iterator[_T]:
+    while (item := queue.get()) is not None:
+        yield item
+
+
+def _chunks_until(chunks: "Queue[str | None]", stop: threading.Event) -> Iterator[str]:
+    """Yield chunks until the reader sends None or `stop` is set."""
+    while True:
+        try:
+            chunk = chunks.get(timeout=_POLL_SECONDS)
+        except Empty:
+            if stop.is_set():
+                return
+            continue
+        if chunk is None:
+            return
+        yield chunk
+
+
+def run_pipeline(
+    source: Iterable[str],
+    transform: Callable[[Iterator[str]], Iterable[str]],
+    out: TextIO,
+    depth: int = QUEUE_DEPTH,
+) -> None:
+    """Run `transform` on `source` in this thread with I/O in two others.
+
+    A reader thread iterates `source` and a writer thread writes each string
+    `transform` yields to `out`, in order. The output matches
+    `out.writelines(transform(iter(source)))`. An exception in any stage
+    stops the other two and is raised here once both threads have ended.
+
+    Args:
+        source: The input chunks, iterated only in the reader thread.
+        transform: Turns the chunks into output text, e.g. tokens as lines.
+        out: Where the writer thread writes the output.
+        depth: The number of items each of the two queues holds before the
+            stage feeding it has to wait.
+    """
+    chunks: "Queue[str | None]" = Queue(maxsize=depth)
+    batches: "Queue[str | None]" = Queue(maxsize=depth)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def read() -> None:
+        try:
+            for chunk in source:
+                if not _put(chunks, chunk, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        _put(chunks, None, stop)
+
+    def write() -> None:
+        # After a failed write keep taking batches, so the lexer never blocks.
+        failed = False
+        for batch in _drain(batches):
+            if failed:
+                continue
+            try:
+                out.write(batch)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+                failed = True
+        if not failed:
+            try:
+                out.flush()
+            except BaseException as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read, name="project1-reader", daemon=True)
+    writer = threading.Thread(target=write, name="project1-writer", daemon=True)
+    reader.start()
+    writer.start()
+    try:
+        batch: list[str] = []
+        for text in transform(_chunks_until(chunks, stop)):
+            batch.append(text)
+            if len(batch) >= _BATCH_LINES:
+                if not _put(batches, "".join(batch), stop):
+                    break
+                batch = []
+        if batch and not stop.is_set():
+            _put(batches, "".join(batch), stop)
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        stop.set()
+        batches.put(None)
+        writer.join()
+        reader.join()
+    if errors:
+        raise errors[0]
@@ -1,23 +1,150 @@
 """Function to call lexer and get tokens.
 
 These are the two project level entry points: `project1` and `project1cli`.
-All the pass-off tests use `project1`.
+The pass-off tests compare the lines of `project1_lines` as they are made;
+`project1` joins those same lines, so both give the graded output.
 """
 
-from sys import argv
+import locale
+import sys
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from typing import Collection, Iterable, Iterator
 
-from project1.lexer import lexer
+from project1.ascii_lexer import is_ascii, lexer_bytes
+from project1.binary import write_tokens
+from project1.checkpoints import (
+    CHECKPOINT_EVERY,
+    build_index,
+    lex_lines,
+    read_index,
+    write_index,
+)
+from project1.compressed import DECOMPRESSION_ERRORS, open_input
+from project1.lexer import DEFAULT_HIDDEN, lexer
+from project1.limits import NO_LIMITS, InputTooLargeError, LexLimitError, LexLimits
+from project1.pipeline import lex_chunks, read_chunks, run_pipeline
+from project1.summary import format_summary, summarize
+from project1.symbols import SymbolTable, write_symbols
+from project1.tables import FactTable, lex_with_facts, read_table
+from project1.token import Token, TokenType
 
 
-def project1(input_string: str) -> str:
-    """Build the token stream for a given input.
+def _tokens(
+    input_string: str | bytes,
+    recover: bool,
+    hidden: Collection[TokenType | str],
+    symbols: SymbolTable | None = None,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[Token]:
+    if isinstance(input_string, bytes):
+        return lexer_bytes(
+            input_string, recover, hidden, symbols=symbols, limits=limits
+        )
+    return lexer(input_string, recover, hidden, symbols=symbols, limits=limits)
+
+
+def _read_input(input_file: str, limits: LexLimits = NO_LIMITS) -> str | bytes:
+    """Read a file the way `open(input_file, "r").read()` would.
+
+    ASCII files are returned as bytes for the `lexer_bytes` fast path with
+    newlines translated as in text mode. Anything else is decoded. Compressed
+    files are decompressed first (see `project1.compressed`). At most one
+    byte more than `limits.max_input_bytes` is read.
+
+    Raises:
+        InputTooLargeError: if the file is larger than `limits.max_input_bytes`.
+    """
+    max_bytes = limits.max_input_bytes
+    with open_input(input_file) as f:
+        data = f.read() if max_bytes is None else f.read(max_bytes + 1)
+    if max_bytes is not None and len(data) > max_bytes:
+        raise InputTooLargeError(
+            "input is larger than {} bytes".format(max_bytes), max_bytes, 1, max_bytes
+        )
+    if not is_ascii(data):
+        text = data.decode(locale.getpreferredencoding(False))
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return data
+
+
+def project1_lines(
+    input_string: str | bytes,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[str]:
+    """Yield the lines of the `project1` output one at a time.
+
+    The output is produced lazily as the lexer runs so that callers can
+    compare or write it without building the whole string. Joining the lines
+    with newlines gives exactly what `project1` returns.
 
     Args:
         input_string (str): The string to tokenize.
+        recover (bool): Report every UNDEFINED token rather than stop at the first one.
+        hidden (Collection[TokenType | str]): The token types to leave out of the output.
+        limits (LexLimits): The limits on input size, token length, steps and time.
+
+    Raises:
+        LexLimitError: if lexing goes over one of `limits` (see `project1.limits`).
+
+    Examples:
+        >>> from project1.project1 import project1_lines
+        >>> list(project1_lines(':!'))
+        ['(COLON,":",1)', '(UNDEFINED,"!",1)', '', 'Total Tokens = Error on line 1']
+    """
+    return format_lines(_tokens(input_string, recover, hidden, limits=limits), recover)
+
+
+def format_lines(tokens: Iterable[Token], recover: bool = False) -> Iterator[str]:
+    """Yield the `project1` output lines for a token stream from the lexer.
+
+    Each token is rendered with `str` and the total, or the error lines, are
+    appended as described for `project1`. `recover` must match the value
+    the tokens were lexed with.
+    """
+    token_count = 0
+    error_lines: list[str] = []
+    undefined = TokenType.UNDEFINED
+    for i in tokens:
+        yield str(i)
+        token_count += 1
+        if i.token_type is undefined:
+            if not recover:
+                yield ""
+                yield "Total Tokens = Error on line " + str(i.line_num)
+                return
+            error_lines.append(str(i.line_num))
+
+    if error_lines:
+        yield ""
+        yield "Total Tokens = Error on lines " + ", ".join(error_lines)
+        return
+    yield "Total Tokens = " + str(token_count)
+
+
+def project1(
+    input_string: str | bytes,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    limits: LexLimits = NO_LIMITS,
+) -> str:
+    """Build the token stream for a given input.
+
+    Args:
+        input_string (str | bytes): The string to tokenize.
+        recover (bool): Report every UNDEFINED token rather than stop at the first one.
+        hidden (Collection[TokenType | str]): The token types to leave out of the output.
+        limits (LexLimits): The limits on input size, token length, steps and time.
 
     Returns:
         out: the token stream, as a string, from the input string
 
+    Raises:
+        LexLimitError: if lexing goes over one of `limits` (see `project1.limits`).
+
     Examples:
         >>> from project1.project1 import project1
         >>> token_stream = project1('\\n\\n::')
@@ -26,16 +153,39 @@ def project1(input_string: str) -> str:
         (COLON,":",3)
         (EOF,"",3)
         Total Tokens = 3
+
+        In recovery mode every error is listed at the end instead.
+
+        >>> print(project1('!\\n:\\n@', recover=True))
+        (UNDEFINED,"!",1)
+        (COLON,":",2)
+        (UNDEFINED,"@",3)
+        (EOF,"",3)
+        <BLANKLINE>
+        Total Tokens = Error on lines 1, 3
     """
-    result: str = ""
-    token_count = 0
-    for i in lexer(input_string):
-        result += str(i) + "\n"
-        token_count += 1
-        if i.token_type == "UNDEFINED":
-            return result + "\nTotal Tokens = Error on line " + str(i.line_num)
+    return "\n".join(project1_lines(input_string, recover, hidden, limits))
+
+
+def _line_range(text: str) -> tuple[int, int]:
+    """Parse an `A:B` line range for `--lines`."""
+    first, sep, last = text.partition(":")
+    try:
+        line_range = int(first), int(last)
+    except ValueError:
+        line_range = (0, 0)
+    if not sep or not 1 <= line_range[0] <= line_range[1]:
+        raise ArgumentTypeError("expected A:B with 1 <= A <= B, not {!r}".format(text))
+    return line_range
 
-    return result + "Total Tokens = " + str(token_count)
+
+def _fact_table(text: str) -> FactTable:
+    """Parse a `[RELATION=]FILE` table for `--facts`."""
+    relation, sep, input_file = text.rpartition("=")
+    try:
+        return read_table(input_file, relation if sep else None)
+    except ValueError as e:
+        raise ArgumentTypeError(str(e))
 
 
 def project1cli() -> None:
@@ -55,13 +205,257 @@ def project1cli() -> None:
     (COLON,":",2)
     (EOF,"",5)
     Total Tokens = 4
+    $ project1 --recover bad.txt
+    (UNDEFINED,"!",1)
+    (UNDEFINED,"@",2)
+    (EOF,"",2)
+
+    Total Tokens = Error on lines 1, 2
+    $ project1 --format=binary t.txt > t.tok
+    $ project1 --format=binary --symbols t.sym t.txt > t.tok
+    $ project1 --hide COMMENT t.txt
+    $ project1 --summary t.txt
+    COLON = 3
+    EOF = 1
+    Total Tokens = 4
+    Total Bytes = 11
+    Total Lines = 4
+    $ project1 --check bad.txt; echo $?
+    Error on line 1
+    1
+    $ project1 --pipeline big.txt
+    $ project1 --pipeline corpus.dl.xz
+    $ project1 --max-token-length 4096 --max-seconds 2 upload.txt; echo $?
+    project1: token longer than 4096 characters at position 120 on line 7
+    2
+    $ project1 --write-index big.idx big.txt
+    $ project1 --index big.idx --lines 1200000:1200050 big.txt
+    $ project1 --facts parent.csv --facts likes=export.tsv.gz program.dl
     ```
+
+    With `--summary` or `--check` the exit status is 1 when the input has an
+    UNDEFINED token and 0 otherwise, and no token is rendered.
+
+    The binary format is described in `project1.binary`. ASCII files are
+    lexed from bytes with the `project1.ascii_lexer` fast path. With
+    `--symbols` the ID and STRING values are also interned and the symbol
+    table is written to the named file (see `project1.symbols`).
+
+    With `--pipeline` the file is read, lexed and written in separate
+    threads (see `project1.pipeline`) rather than read whole first. The
+    output is the same; only text output can be pipelined.
+
+    A gzip, bz2 or xz compressed file is detected by its first bytes and
+    decompressed as it is read, with no temporary file. Combined with
+    `--pipeline` the decompressed text is never held in memory at once.
+
+    `--max-input-bytes`, `--max-token-length`, `--max-steps` and
+    `--max-seconds` set the `project1.limits.LexLimits` for the run. Going
+    over one prints the error and exits with status 2; output already
+    written stays written. Limits cannot be combined with `--pipeline`. An
+    input that cannot be read, such as a missing file or a truncated or
+    corrupt compressed one, is reported the same way.
+
+    `--write-index` lexes the file once and writes a checkpoint index for
+    it (see `project1.checkpoints`), one checkpoint per `--index-every`
+    lines. `--lines A:B` with that index prints just the tokens on lines A
+    to B, lexing only from the nearest checkpoint before line A. They are
+    the same lines a full lex prints for those tokens, with no total.
+
+    `--facts [RELATION=]FILE` adds each row of a CSV or TSV table to the
+    Facts section of the input as a fact of RELATION, by default the file
+    name up to its first "." (see `project1.tables`). The output is what
+    the input with those facts written into it would give, but the rows are
+    never rendered or lexed.
     """
-    if len(argv) == 2:
-        input_file = argv[1]
-        with open(input_file, "r") as f:
-            input_string = f.read()
-            result = project1(input_string)
-            print(result)
-    else:
-        print("usage: project1 <input file>")
+    parser = ArgumentParser(prog="project1")
+    parser.add_argument("input_file", help="the Datalog file to tokenize")
+    parser.add_argument(
+        "--recover",
+        action="store_true",
+        help="keep lexing after an UNDEFINED token and report every error",
+    )
+    parser.add_argument(
+        "--hide",
+        action="append",
+        default=[],
+        choices=[
+            i.name for i in TokenType if i not in {TokenType.EOF, TokenType.UNDEFINED}
+        ],
+        metavar="TYPE",
+        help="also leave tokens of this type out of the output (repeatable)",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--format",
+        choices=["text", "binary"],
+        default="text",
+        help="write the token stream as text (default) or in the binary format",
+    )
+    mode.add_argument(
+        "--summary",
+        action="store_true",
+        help="print token counts by type and totals instead of the tokens",
+    )
+    mode.add_argument(
+        "--check",
+        action="store_true",
+        help="print nothing unless the input has an error",
+    )
+    mode.add_argument(
+        "--write-index",
+        metavar="FILE",
+        help="write a checkpoint index for --lines to FILE instead of the tokens",
+    )
+    mode.add_argument(
+        "--lines",
+        type=_line_range,
+        metavar="A:B",
+        help="print only the tokens on lines A to B, using the --index file",
+    )
+    parser.add_argument(
+        "--index",
+        metavar="FILE",
+        help="the checkpoint index written by --write-index to use for --lines",
+    )
+    parser.add_argument(
+        "--index-every",
+        type=int,
+        default=CHECKPOINT_EVERY,
+        metavar="N",
+        help="with --write-index, the number of lines between checkpoints "
+        "(default {})".format(CHECKPOINT_EVERY),
+    )
+    parser.add_argument(
+        "--facts",
+        action="append",
+        default=[],
+        type=_fact_table,
+        metavar="[RELATION=]FILE",
+        help="add the rows of a CSV or TSV file to the Facts section (repeatable)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, lexing and writing in separate threads",
+    )
+    parser.add_argument(
+        "--symbols",
+        metavar="FILE",
+        help="with --format=binary, also write the symbol table of ID and STRING values",
+    )
+    limit_options = parser.add_argument_group("limits")
+    limit_options.add_argument(
+        "--max-input-bytes",
+        type=int,
+        metavar="N",
+        help="fail if the input is larger than N bytes after decompression",
+    )
+    limit_options.add_argument(
+        "--max-token-length",
+        type=int,
+        metavar="N",
+        help="fail on any token longer than N characters",
+    )
+    limit_options.add_argument(
+        "--max-steps",
+        type=int,
+        metavar="N",
+        help="fail after lexing N tokens, hidden ones included",
+    )
+    limit_options.add_argument(
+        "--max-seconds",
+        type=float,
+        metavar="S",
+        help="fail if lexing takes longer than S seconds",
+    )
+    args = parser.parse_args()
+    limits = LexLimits(
+        args.max_input_bytes, args.max_token_length, args.max_steps, args.max_seconds
+    )
+    if args.pipeline and (args.summary or args.check or args.format != "text"):
+        parser.error("--pipeline only applies to text output")
+    if args.pipeline and limits != NO_LIMITS:
+        parser.error("--pipeline cannot be combined with limits")
+    if args.symbols and args.format != "binary":
+        parser.error("--symbols only applies to --format=binary")
+    if bool(args.lines) != bool(args.index):
+        parser.error("--lines and --index must be given together")
+    if (args.lines or args.write_index) and (args.pipeline or limits != NO_LIMITS):
+        parser.error(
+            "--lines and --write-index cannot be combined with --pipeline or limits"
+        )
+    if args.facts and (
+        args.summary or args.check or args.pipeline or args.lines or args.write_index
+    ):
+        parser.error("--facts only applies to text and binary output")
+    if args.index_every < 1:
+        parser.error("--index-every must be at least 1")
+
+    hidden = DEFAULT_HIDDEN.union(args.hide)
+    errors: tuple[type[Exception], ...] = (
+        LexLimitError,
+        ValueError,
+        *DECOMPRESSION_ERRORS,
+    )
+    try:
+        _run(args, hidden, limits)
+    except errors as e:
+        sys.stdout.flush()
+        print("project1: {}".format(e), file=sys.stderr)
+        sys.exit(2)
+
+
+def _run(
+    args: Namespace, hidden: Collection[TokenType | str], limits: LexLimits
+) -> None:
+    """Carry out a `project1cli` run once its arguments are checked."""
+    if args.write_index:
+        index = build_index(args.input_file, args.index_every)
+        with open(args.write_index, "wb") as f:
+            write_index(index, f)
+        return
+    if args.lines:
+        first, last = args.lines
+        with open(args.index, "rb") as index_file:
+            index = read_index(index_file.read())
+        for i in lex_lines(args.input_file, index, first, last, args.recover, hidden):
+            sys.stdout.write(str(i) + "\n")
+        return
+    if args.pipeline:
+        recover = args.recover
+
+        def format_chunks(chunks: Iterator[str]) -> Iterator[str]:
+            for i in format_lines(lex_chunks(chunks, recover, hidden), recover):
+                yield i + "\n"
+
+        run_pipeline(read_chunks(args.input_file), format_chunks, sys.stdout)
+        return
+    input_string = _read_input(args.input_file, limits)
+    if args.summary or args.check:
+        summary = summarize(input_string, args.recover, hidden, limits)
+        if args.summary:
+            print(format_summary(summary))
+        elif summary.first_error_line is not None:
+            print("Error on line {}".format(summary.first_error_line))
+        sys.exit(0 if summary.first_error_line is None else 1)
+    if args.facts:
+        tokens = lex_with_facts(input_string, args.facts, args.recover, hidden, limits)
+    if args.format == "binary":
+        symbols = SymbolTable() if args.symbols else None
+        if not args.facts:
+            tokens = _tokens(input_string, args.recover, hidden, symbols, limits)
+        elif symbols is not None:
+            tokens = (symbols.attach(i) for i in tokens)
+        write_tokens(tokens, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        if symbols is not None:
+            with open(args.symbols, "wb") as f:
+                write_symbols(symbols, f)
+        return
+    lines = (
+        format_lines(tokens, args.recover)
+        if args.facts
+        else project1_lines(input_string, args.recover, hidden, limits)
+    )
+    sys.stdout.writelines(i + "\n" for i in lines)
@@ -0,0 +1,236 @@
+"""Token buffers in shared memory for handing a token stream to other processes.
+
+Pickling a `Token` per token to send a lexed program to worker processes
+costs far more than the lexing. `share_tokens` instead lexes at the span
+level (see `project1.lexer.scan`) and writes the result once into a
+`multiprocessing.shared_memory` block as columns plus the UTF-8 source:
+
+    header:  b"P1SM", version (one byte), 3 pad bytes, token count (u64), text bytes (u64)
+    offsets: u64 per token, the byte offset of the token value in the text
+    lengths: u32 per token, the byte length of the token value
+    lines:   u32 per token, the line number of the token
+    types:   u8 per token, the `TokenType` code
+    text:    the source as UTF-8
+
+A worker needs only the block name to `SharedTokenView.attach` to it. The
+columns are exposed as `memoryview`s over the block, so nothing is copied
+until a worker asks for a `Token` or a value.
+
+The header is little-endian, but the columns are written and read in the
+native byte order of the machine, as `array` and `memoryview.cast` use it,
+so that no column is converted on either side. A block is only shared
+between processes on one machine, so it is not a file format: to move a
+token stream between machines use `project1.binary` instead.
+
+Lifetime is explicit. The process that called `share_tokens` owns the block
+and must `unlink` it once every worker is done; each view, the owner's
+included, must be closed. Both are context managers: leaving the owner's
+`with` block closes and unlinks, leaving a worker's only closes. On Python
+versions before 3.13 an attaching process registers the block with its
+resource tracker, so workers should be processes started by
+`multiprocessing` from the owner, which share its tracker.
+
+Examples:
+    >>> from project1.shared import SharedTokenView, share_tokens
+    >>> with share_tokens("a('b').") as owner:
+    ...     with SharedTokenView.attach(owner.name) as view:
+    ...         print(len(view), view[2], view.value(2))
+    6 (STRING,"'b'",1) 'b'
+"""
+
+import struct
+import sys
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+from typing import Collection, Iterator
+
+from project1.ascii_lexer import is_ascii, scan_bytes
+from project1.binary import TOKEN_TYPES
+from project1.lexer import DEFAULT_HIDDEN, scan
+from project1.token import Token, TokenType
+
+MAGIC = b"P1SM"
+"""The first bytes of every shared token block."""
+
+VERSION = 1
+"""The layout version written by `share_tokens`."""
+
+_HEADER = struct.Struct("<4sB3xQQ")
+
+
+def _layout(count: int, text_bytes: int) -> tuple[int, int, int, int, int, int]:
+    offsets = _HEADER.size
+    lengths = offsets + 8 * count
+    lines = lengths + 4 * count
+    types = lines + 4 * count
+    text = types + count
+    return offsets, lengths, lines, types, text, text + text_bytes
+
+
+def _attach(name: str) -> SharedMemory:
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    return SharedMemory(name=name)
+
+
+class SharedTokenView:
+    """Zero-copy view of the token columns in a shared memory block.
+
+    Attributes:
+        name (str): The name of the shared memory block.
+        offsets (memoryview): Byte offset of each token value in `text`.
+        lengths (memoryview): Byte length of each token value.
+        lines (memoryview): Line number of each token.
+        types (memoryview): Type code of each token, an index into `TOKEN_TYPES`.
+        text (memoryview): The UTF-8 source the values are taken from.
+    """
+
+    __slots__ = [
+        "_shm",
+        "_owner",
+        "_count",
+        "name",
+        "offsets",
+        "lengths",
+        "lines",
+        "types",
+        "text",
+    ]
+
+    def __init__(self, shm: SharedMemory, owner: bool = False) -> None:
+        """Map the columns of a block. Use `attach` or `share_tokens` instead.
+
+        Raises:
+            ValueError: if the block does not hold shared tokens.
+        """
+        buf = shm.buf
+        assert buf is not None
+        magic, version, count, text_bytes = _HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION:
+            shm.close()
+            raise ValueError("{} does not hold shared tokens".format(shm.name))
+        offsets, lengths, lines, types, text, end = _layout(count, text_bytes)
+        self._shm = shm
+        self._owner = owner
+        self._count: int = count
+        self.name = shm.name
+        self.offsets = buf[offsets:lengths].cast("Q")
+        self.lengths = buf[lengths:lines].cast("I")
+        self.lines = buf[lines:types].cast("I")
+        self.types = buf[types:text]
+        self.text = buf[text:end]
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedTokenView":
+        """Open a view of the block called `name` created by `share_tokens`."""
+        return cls(_attach(name))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def value(self, index: int) -> str:
+        """Decode the value of the token at `index`."""
+        start = self.offsets[index]
+        return str(self.text[start : start + self.lengths[index]], "utf-8")
+
+    def token_type(self, index: int) -> TokenType:
+        """Return the type of the token at `index`."""
+        return TOKEN_TYPES[self.types[index]]
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("token index out of range")
+        return Token(self.token_type(index), self.value(index), self.lines[index])
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self) -> None:
+        """Release the column views and detach from the block."""
+        for i in (self.offsets, self.lengths, self.lines, self.types, self.text):
+            i.release()
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Ask the system to free the block once every process has closed it.
+
+        Only the owner should unlink, and only once.
+        """
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedTokenView":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+        if self._owner:
+            self.unlink()
+
+
+def share_tokens(
+    input_string: str | bytes,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    name: str | None = None,
+) -> SharedTokenView:
+    """Lex `input_string` into a new shared memory block.
+
+    Args:
+        input_string: The input to lex; ASCII bytes use the `scan_bytes` fast path.
+        recover: Keep lexing after an UNDEFINED token.
+        hidden: The token types to leave out.
+        name: The name for the block, or None for a generated one.
+
+    Returns:
+        owner: a view of the new block that is responsible for unlinking it.
+    """
+    offsets = array("Q")
+    lengths = array("I")
+    lines = array("I")
+    types = array("B")
+
+    if isinstance(input_string, bytes) and not is_ascii(input_string):
+        input_string = input_string.decode("utf-8")
+    if isinstance(input_string, bytes) or input_string.isascii():
+        text = (
+            input_string
+            if isinstance(input_string, bytes)
+            else input_string.encode("ascii")
+        )
+        for token_type, start, end, line_num in scan_bytes(text, recover, hidden):
+            offsets.append(start)
+            lengths.append(end - start)
+            lines.append(line_num)
+            types.append(token_type)
+    else:
+        text = input_string.encode("utf-8")
+        char_offset = byte_offset = 0
+        for token_type, start, end, line_num in scan(input_string, recover, hidden):
+            byte_offset += len(input_string[char_offset:start].encode("utf-8"))
+            char_offset = start
+            offsets.append(byte_offset)
+            lengths.append(len(input_string[start:end].encode("utf-8")))
+            lines.append(line_num)
+            types.append(token_type)
+
+    count = len(types)
+    offset_at, length_at, line_at, type_at, text_at, size = _layout(count, len(text))
+    shm = SharedMemory(name=name, create=True, size=size)
+    buf = shm.buf
+    assert buf is not None
+    _HEADER.pack_into(buf, 0, MAGIC, VERSION, count, len(text))
+    buf[offset_at:length_at] = offsets.tobytes()
+    buf[length_at:line_at] = lengths.tobytes()
+    buf[line_at:type_at] = lines.tobytes()
+    buf[type_at:text_at] = types.tobytes()
+    buf[text_at:size] = text
+    return SharedTokenView(shm, owner=True)
@@ -0,0 +1,186 @@
+"""Buffered token stream with lookahead and backtracking for parsers.
+
+A Datalog parser reads the tokens from `lexer` one at a time, but it also
+needs to look ahead and sometimes to back up and try another production.
+`TokenStream` wraps the lexer generator and pulls tokens only as they are
+needed into a ring buffer. Tokens behind both the current position and the
+oldest live mark are dropped, so the memory used depends on how far the
+parser looks ahead and backtracks and not on the length of the input.
+
+Examples:
+    >>> from project1.lexer import lexer
+    >>> from project1.stream import TokenStream
+    >>> stream = TokenStream(lexer("a(b)?"))
+    >>> print(stream.peek(1))
+    (LEFT_PAREN,"(",1)
+    >>> print(stream.expect("ID"))
+    (ID,"a",1)
+    >>> mark = stream.mark()
+    >>> print(stream.advance(), stream.advance())
+    (LEFT_PAREN,"(",1) (ID,"b",1)
+    >>> stream.reset(mark)
+    >>> print(stream.peek())
+    (LEFT_PAREN,"(",1)
+"""
+
+from typing import Iterable
+
+from project1.token import Token, TokenType
+
+
+class UnexpectedTokenError(Exception):
+    """Raised by `TokenStream.expect` when the next token has the wrong type.
+
+    Attributes:
+        expected (TokenType): The type that was expected.
+        token (Token): The token that was found instead.
+    """
+
+    def __init__(self, expected: TokenType, token: Token) -> None:
+        super().__init__("expected {} but found {}".format(expected.name, token))
+        self.expected = expected
+        self.token = token
+
+
+class TokenStream:
+    """Lazily filled token buffer with `peek`, `advance` and `mark`/`reset`.
+
+    The buffer is a ring indexed by the absolute position of each token in the
+    stream. It doubles in size when lookahead and live marks need more room
+    than it has, and never shrinks, so `peek(k)` is a constant time lookup.
+    Once the underlying tokens run out, the last token (normally EOF) is
+    returned for every position past the end.
+
+    Attributes:
+        position (int): The number of tokens consumed by `advance` so far.
+    """
+
+    __slots__ = [
+        "_tokens",
+        "_ring",
+        "_mask",
+        "_base",
+        "_count",
+        "_marks",
+        "_last",
+        "position",
+    ]
+
+    def __init__(self, tokens: Iterable[Token], capacity: int = 16) -> None:
+        """Wrap `tokens` without reading any of them yet.
+
+        Args:
+            tokens: The token source, normally `lexer(input_string)`.
+            capacity: The initial size of the ring buffer, rounded up to a power of two.
+        """
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._tokens = iter(tokens)
+        self._ring: list[Token | None] = [None] * size
+        self._mask = size - 1
+        self._base = 0
+        self._count = 0
+        self._marks: list[int] = []
+        self._last: Token | None = None
+        self.position = 0
+
+    def _grow(self) -> None:
+        old = self._ring
+        old_mask = self._mask
+        size = len(old) * 2
+        self._ring = [None] * size
+        self._mask = size - 1
+        for i in range(self._base, self._base + self._count):
+            self._ring[i & self._mask] = old[i & old_mask]
+
+    def _fill(self, index: int) -> bool:
+        while index >= self._base + self._count:
+            token = next(self._tokens, None)
+            if token is None:
+                return False
+            if self._count == len(self._ring):
+                self._grow()
+            self._ring[(self._base + self._count) & self._mask] = token
+            self._count += 1
+            self._last = token
+        return True
+
+    def _trim(self) -> None:
+        # Keep from the earliest of the cursor and every live mark: after a
+        # reset to an earlier mark, a later mark can be ahead of the cursor.
+        keep = self.position
+        if self._marks:
+            keep = min(keep, min(self._marks))
+        while self._base < keep and self._count > 0:
+            self._ring[self._base & self._mask] = None
+            self._base += 1
+            self._count -= 1
+
+    def peek(self, k: int = 0) -> Token:
+        """Return the token `k` positions ahead without consuming anything.
+
+        `peek()` is the next token that `advance` would return.
+
+        Raises:
+            IndexError: if the stream has no tokens at all.
+        """
+        index = self.position + k
+        if self._fill(index):
+            token = self._ring[index & self._mask]
+            assert token is not None
+            return token
+        if self._last is None:
+            raise IndexError("empty token stream")
+        return self._last
+
+    def advance(self) -> Token:
+        """Consume and return the next token."""
+        token = self.peek()
+        if self.position < self._base + self._count:
+            self.position += 1
+            self._trim()
+        return token
+
+    def expect(self, token_type: TokenType | str) -> Token:
+        """Consume and return the next token if it has type `token_type`.
+
+        The type can also be given by name, as in `expect("ID")`.
+
+        Raises:
+            UnexpectedTokenError: if the next token has another type. Nothing is consumed.
+        """
+        token = self.peek()
+        if token.token_type != token_type:
+            expected = TokenType.of(token_type)
+            if token.token_type != expected:
+                raise UnexpectedTokenError(expected, token)
+        return self.advance()
+
+    def mark(self) -> int:
+        """Remember the current position so that `reset` can return to it.
+
+        Tokens from the oldest live mark onward stay buffered until the mark
+        is passed to `reset` or `release`.
+        """
+        self._marks.append(self.position)
+        return self.position
+
+    def reset(self, mark: int) -> None:
+        """Return to `mark` and release it.
+
+        Raises:
+            ValueError: if `mark` is not a live mark.
+        """
+        self._marks.remove(mark)
+        self.position = mark
+        self._trim()
+
+    def release(self, mark: int) -> None:
+        """Drop `mark` without moving, for when the parser commits to a choice.
+
+        Raises:
+            ValueError: if `mark` is not a live mark.
+        """
+        self._marks.remove(mark)
+        self._trim()
@@ -0,0 +1,121 @@
+"""Token counts for validating input without rendering the token stream.
+
+Bulk validation only needs to know whether a file lexes and how many tokens
+of each type it has. `summarize` runs the lexer at the span level (see
+`project1.lexer.scan`), so no token value is sliced out of the input, no
+`Token` is created, and nothing is formatted with `__str__`.
+
+Examples:
+    >>> from project1.summary import summarize, format_summary
+    >>> from project1.token import TokenType
+    >>> summary = summarize("Facts: a('b').\\n")
+    >>> summary.counts[TokenType.STRING], summary.total_tokens, summary.first_error_line
+    (1, 8, None)
+    >>> print(format_summary(summarize(b"a\\n!b")))
+    UNDEFINED = 1
+    ID = 1
+    Total Tokens = 2
+    Total Bytes = 4
+    Total Lines = 2
+    Error on line 2
+"""
+
+from collections import Counter
+from typing import Collection, Iterator, NamedTuple
+
+from project1.ascii_lexer import is_ascii, scan_bytes
+from project1.lexer import DEFAULT_HIDDEN, Span, scan
+from project1.limits import NO_LIMITS, LexLimits
+from project1.token import TokenType
+
+
+class LexSummary(NamedTuple):
+    """What `summarize` found in its input.
+
+    Attributes:
+        counts (dict[TokenType, int]): The number of tokens of each type that appears.
+        total_tokens (int): The number of tokens, EOF and UNDEFINED included.
+        total_bytes (int): The size of the input in bytes (UTF-8 for a `str`).
+        total_lines (int): The number of lines in the input.
+        first_error_line (int | None): The line of the first UNDEFINED token, if any.
+    """
+
+    counts: dict[TokenType, int]
+    total_tokens: int
+    total_bytes: int
+    total_lines: int
+    first_error_line: int | None
+
+
+def summarize(
+    input_string: str | bytes,
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    limits: LexLimits = NO_LIMITS,
+) -> LexSummary:
+    """Count the tokens in `input_string` by type without building them.
+
+    ASCII bytes are scanned with the `project1.ascii_lexer` fast path; any
+    other bytes are decoded as UTF-8 first.
+
+    Args:
+        input_string: The input to lex.
+        recover: Keep counting after an UNDEFINED token.
+        hidden: The token types to leave out of the counts.
+        limits: The limits on input size, token length, steps and time.
+
+    Returns:
+        summary: the counts and totals for the input.
+
+    Raises:
+        LexLimitError: if lexing goes over one of `limits` (see `project1.limits`).
+    """
+    spans: Iterator[Span]
+    if isinstance(input_string, bytes):
+        total_bytes = len(input_string)
+        if is_ascii(input_string):
+            spans = scan_bytes(input_string, recover, hidden, limits=limits)
+        else:
+            spans = scan(input_string.decode("utf-8"), recover, hidden, limits=limits)
+        newlines = input_string.count(b"\n")
+        last_line_open = input_string != b"" and not input_string.endswith(b"\n")
+    else:
+        total_bytes = (
+            len(input_string)
+            if input_string.isascii()
+            else len(input_string.encode("utf-8"))
+        )
+        spans = scan(input_string, recover, hidden, limits=limits)
+        newlines = input_string.count("\n")
+        last_line_open = input_string != "" and not input_string.endswith("\n")
+
+    counts: Counter[TokenType] = Counter()
+    first_error_line: int | None = None
+    undefined = TokenType.UNDEFINED
+    for token_type, _, _, line_num in spans:
+        counts[token_type] += 1
+        if token_type is undefined and first_error_line is None:
+            first_error_line = line_num
+
+    return LexSummary(
+        counts=dict(counts),
+        total_tokens=sum(counts.values()),
+        total_bytes=total_bytes,
+        total_lines=newlines + (1 if last_line_open else 0),
+        first_error_line=first_error_line,
+    )
+
+
+def format_summary(summary: LexSummary) -> str:
+    """Render a summary as `NAME = value` lines, token types in code order."""
+    lines = [
+        "{} = {}".format(i.name, summary.counts[i])
+        for i in TokenType
+        if i in summary.counts
+    ]
+    lines.append("Total Tokens = {}".format(summary.total_tokens))
+    lines.append("Total Bytes = {}".format(summary.total_bytes))
+    lines.append("Total Lines = {}".format(summary.total_lines))
+    if summary.first_error_line is not None:
+        lines.append("Error on line {}".format(summary.first_error_line))
+    return "\n".join(lines)
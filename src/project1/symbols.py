@@ -0,0 +1,164 @@
+"""Symbol table that interns identifier and string values to integer ids.
+
+A Datalog program repeats the same identifiers and string constants many
+times over, as in thousands of `snap('1234', ...)` facts. A `SymbolTable`
+keeps one copy of each distinct ID or STRING value and numbers them from 0
+in order of first appearance. An interned token carries its number as
+`symbol_id` and its value is the table's copy, so duplicates share storage
+and later stages can compare ids rather than strings.
+
+Ids depend only on the order values are first seen, so interning the same
+token stream into an empty table always gives the same ids. `write_symbols`
+and `read_symbols` save a table next to a token stream (see
+`project1.binary`) so that it can be shared across files.
+
+Examples:
+    >>> from project1.lexer import lexer
+    >>> from project1.symbols import SymbolTable
+    >>> symbols = SymbolTable()
+    >>> tokens = list(lexer("a('x'). b('x'). a('y').", symbols=symbols))
+    >>> [i.symbol_id for i in tokens if i.symbol_id is not None]
+    [0, 1, 2, 1, 0, 3]
+    >>> symbols.values
+    ['a', "'x'", 'b', "'y'"]
+"""
+
+from typing import BinaryIO, Iterable, Iterator
+
+from project1.binary import BinaryFormatError, _put_varint
+from project1.token import Token, TokenType
+
+SYMBOL_TYPES: frozenset[TokenType] = frozenset([TokenType.ID, TokenType.STRING])
+"""The token types whose values are interned."""
+
+MAGIC = b"P1SY"
+"""The first bytes of a symbol table written by `write_symbols`."""
+
+VERSION = 1
+"""The version of the symbol table format written by `write_symbols`."""
+
+
+class SymbolTable:
+    """Distinct ID and STRING values numbered in order of first appearance.
+
+    Attributes:
+        values (list[str]): The interned values indexed by symbol id.
+    """
+
+    __slots__ = ["_ids", "values"]
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        """Start a table, optionally with values that take ids from 0 in order.
+
+        Raises:
+            ValueError: if `values` has a duplicate.
+        """
+        self.values: list[str] = []
+        self._ids: dict[str, int] = {}
+        for i in values:
+            if i in self._ids:
+                raise ValueError("duplicate symbol {!r}".format(i))
+            self.intern(i)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._ids
+
+    def __getitem__(self, symbol_id: int) -> str:
+        return self.values[symbol_id]
+
+    def intern(self, value: str) -> int:
+        """Return the id of `value`, adding it to the table if it is new."""
+        symbol_id = self._ids.get(value)
+        if symbol_id is None:
+            symbol_id = len(self.values)
+            self._ids[value] = symbol_id
+            self.values.append(value)
+        return symbol_id
+
+    def symbol_id(self, value: str) -> int | None:
+        """Return the id of `value` without adding it, or None if it is not interned."""
+        return self._ids.get(value)
+
+    def attach(self, token: Token) -> Token:
+        """Return `token` with its symbol id and the table's copy of its value.
+
+        Tokens of a type outside `SYMBOL_TYPES` are returned as they are.
+        """
+        if token.token_type not in SYMBOL_TYPES:
+            return token
+        symbol_id = self.intern(token.value)
+        return Token(
+            token.token_type, self.values[symbol_id], token.line_num, symbol_id
+        )
+
+
+def intern_tokens(tokens: Iterable[Token], symbols: SymbolTable) -> Iterator[Token]:
+    """Yield `tokens` with every ID and STRING value interned in `symbols`.
+
+    Use it on tokens that were not lexed with a symbol table, such as those
+    from `project1.binary.read_tokens`.
+    """
+    for i in tokens:
+        yield symbols.attach(i)
+
+
+def write_symbols(symbols: SymbolTable, stream: BinaryIO) -> int:
+    """Write `symbols` to `stream` and return the number of values written.
+
+    The layout is `MAGIC`, the version as one byte, the number of values as
+    a varint, and then each value in id order as a varint byte length and
+    its UTF-8 bytes (varints as in `project1.binary`).
+    """
+    buffer = bytearray(MAGIC)
+    buffer.append(VERSION)
+    _put_varint(buffer, len(symbols))
+    for i in symbols.values:
+        encoded = i.encode("utf-8")
+        _put_varint(buffer, len(encoded))
+        buffer += encoded
+    stream.write(buffer)
+    return len(symbols)
+
+
+def _get_varint(view: memoryview, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, pos
+
+
+def read_symbols(data: bytes | bytearray | memoryview) -> SymbolTable:
+    """Read a symbol table written by `write_symbols`.
+
+    Raises:
+        BinaryFormatError: if `data` is not a well-formed symbol table.
+    """
+    view = memoryview(data)
+    if bytes(view[:4]) != MAGIC:
+        raise BinaryFormatError("not a symbol table")
+    if len(view) < 5 or view[4] != VERSION:
+        raise BinaryFormatError("unsupported symbol table version")
+    pos = 5
+    values: list[str] = []
+    try:
+        count, pos = _get_varint(view, pos)
+        for _ in range(count):
+            length, pos = _get_varint(view, pos)
+            if pos + length > len(view):
+                raise BinaryFormatError("truncated symbol at byte {}".format(pos))
+            values.append(str(view[pos : pos + length], "utf-8"))
+            pos += length
+    except IndexError:
+        raise BinaryFormatError("malformed symbol table at byte {}".format(pos))
+    except UnicodeDecodeError:
+        raise BinaryFormatError("invalid UTF-8 symbol at byte {}".format(pos))
+    if len(set(values)) != len(values):
+        raise BinaryFormatError("duplicate symbol in symbol table")
+    return SymbolTable(values)
@@ -0,0 +1,265 @@
+"""Facts from CSV and TSV tables, lexed without rendering them as Datalog.
+
+Most Facts sections are generated from tabular exports: a relation name
+and rows of values. Rendering them as Datalog text only to lex that text
+again costs a pass over every row. `fact_tokens` instead makes the tokens
+for each row directly, exactly the ones a lex of `render_facts` would give,
+and `lex_with_facts` merges them into the lexed rest of a program.
+
+Each row is one fact on its own line, `relation('v1','v2').`, with every
+value a STRING whose `'` is doubled as `''`. A value with a newline in it
+makes a STRING that spans lines, and the line numbers count that too.
+
+Examples:
+    >>> from project1.tables import FactTable, fact_tokens, render_facts
+    >>> table = FactTable("says", [["it's", "hi"], ["a", "b"]])
+    >>> print("".join(render_facts([table])), end="")
+    says('it''s','hi').
+    says('a','b').
+    >>> print(*fact_tokens([table], line_num=3, hidden=["WHITESPACE", "COMMA"]))
+    (ID,"says",3) (LEFT_PAREN,"(",3) (STRING,"'it''s'",3) (STRING,"'hi'",3) (RIGHT_PAREN,")",3) (PERIOD,".",3) (ID,"says",4) (LEFT_PAREN,"(",4) (STRING,"'a'",4) (STRING,"'b'",4) (RIGHT_PAREN,")",4) (PERIOD,".",4)
+"""
+
+import csv
+import io
+import itertools
+import os
+import re
+from typing import Collection, Iterable, Iterator, NamedTuple, Sequence
+
+from project1.ascii_lexer import lexer_bytes
+from project1.compressed import open_input
+from project1.fsm import ID
+from project1.lexer import DEFAULT_HIDDEN, _SECTION_TYPES, _hidden_types, lexer
+from project1.limits import NO_LIMITS, LexLimits
+from project1.token import Token, TokenType
+
+_RELATION = re.compile(r"[A-Za-z][A-Za-z0-9]*")
+
+TSV_EXTENSIONS = (".tsv", ".tab")
+"""The extensions `read_table` reads as tab separated; anything else is CSV."""
+
+
+class FactTable(NamedTuple):
+    """The rows of one relation to add as facts.
+
+    Attributes:
+        relation (str): The name of the relation, an ID that is not a keyword.
+        rows (Iterable[Sequence[str]]): The values of each fact, in order.
+            Rows with no values, such as blank lines in a CSV file, are skipped.
+    """
+
+    relation: str
+    rows: Iterable[Sequence[str]]
+
+
+def _check_relation(relation: str) -> None:
+    """Raise ValueError unless `relation` lexes as one ID token."""
+    if _RELATION.fullmatch(relation) is None or relation in ID.keywords:
+        raise ValueError("{!r} is not a relation name".format(relation))
+
+
+class _FileRows:
+    """The rows of a CSV or TSV file, read again each time they are iterated."""
+
+    def __init__(self, input_file: str, delimiter: str) -> None:
+        self.input_file = input_file
+        self.delimiter = delimiter
+
+    def __iter__(self) -> Iterator[list[str]]:
+        with open_input(self.input_file) as f:
+            text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+            yield from csv.reader(text, delimiter=self.delimiter)
+
+
+def read_table(
+    input_file: str, relation: str | None = None, delimiter: str | None = None
+) -> FactTable:
+    """Return the rows of a CSV or TSV file as a `FactTable`.
+
+    The file is read lazily, one row at a time, each time the rows are
+    iterated. It may be compressed (see `project1.compressed`) and is
+    decoded as UTF-8. Fields are parsed with `csv.reader`, so a field with
+    the delimiter or a newline in it can be quoted with `"`.
+
+    Args:
+        input_file: The file to read.
+        relation: The relation name, by default the file name up to its
+            first ".", so that `parent.csv.gz` gives `parent`.
+        delimiter: The field separator, by default a tab for the
+            `TSV_EXTENSIONS` (before any compression extension) and a comma
+            otherwise.
+
+    Raises:
+        ValueError: if the relation name is not an ID or is a keyword.
+    """
+    name = os.path.basename(input_file)
+    if relation is None:
+        relation = name.split(".")[0]
+    _check_relation(relation)
+    if delimiter is None:
+        extensions = name.lower().split(".")[1:]
+        delimiter = "\t" if any("." + i in TSV_EXTENSIONS for i in extensions) else ","
+    return FactTable(relation, _FileRows(input_file, delimiter))
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def render_facts(tables: Iterable[FactTable]) -> Iterator[str]:
+    """Yield the Datalog line, newline included, for each row of `tables`.
+
+    Raises:
+        ValueError: if a relation name is not an ID or is a keyword.
+    """
+    for relation, rows in tables:
+        _check_relation(relation)
+        for row in rows:
+            if row:
+                yield relation + "(" + ",".join(_quote(i) for i in row) + ").\n"
+
+
+def _row_tokens(tables: Iterable[FactTable], line_num: int) -> Iterator[Token]:
+    """Yield every token of `render_facts(tables)`, WHITESPACE included.
+
+    The lines start at `line_num`, and no EOF is yielded.
+    """
+    left_paren = Token.left_paren("(")
+    right_paren = Token.right_paren(")")
+    comma = Token.comma(",")
+    period = Token.period(".")
+    newline = Token.whitespace("\n")
+    string_type = TokenType.STRING
+    for relation, rows in tables:
+        _check_relation(relation)
+        relation_token = Token.id(relation)
+        for row in rows:
+            if not row:
+                continue
+            yield relation_token.at_line(line_num)
+            yield left_paren.at_line(line_num)
+            for i, value in enumerate(row):
+                if i:
+                    yield comma.at_line(line_num)
+                yield Token(string_type, _quote(value), line_num)
+                if "\n" in value:
+                    line_num += value.count("\n")
+            yield right_paren.at_line(line_num)
+            yield period.at_line(line_num)
+            yield newline.at_line(line_num)
+            line_num += 1
+
+
+def fact_tokens(
+    tables: Iterable[FactTable],
+    line_num: int = 1,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+) -> Iterator[Token]:
+    """Yield the tokens `lexer` gives for `render_facts(tables)`, without EOF.
+
+    Args:
+        tables: The relations and rows to make facts of.
+        line_num: The line the first fact is on.
+        hidden: The token types to leave out of the output.
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED, or a relation name
+            is not an ID or is a keyword.
+    """
+    hidden_types = _hidden_types(hidden)
+    for i in _row_tokens(tables, line_num):
+        if i.token_type not in hidden_types:
+            yield i
+
+
+def lex_with_facts(
+    input_string: str | bytes,
+    tables: Iterable[FactTable],
+    recover: bool = False,
+    hidden: Collection[TokenType | str] = DEFAULT_HIDDEN,
+    limits: LexLimits = NO_LIMITS,
+) -> Iterator[Token]:
+    """Lex a program with the rows of `tables` added to its Facts section.
+
+    The tokens are the ones a lex of the program gives with
+    `render_facts(tables)` put in just before the token that ends its first
+    Facts section: the next SCHEMES, RULES or QUERIES token, or EOF. If that
+    token does not start a line, a newline goes in first so that each fact
+    is on a line of its own. Every token after the facts is moved down by
+    the number of lines put in. `input_string` is lexed with `lexer_bytes`
+    when it is bytes and with `lexer` otherwise; the rows are never lexed.
+
+    The exception is an unterminated string in the Facts section. Lexed on
+    its own it is an UNDEFINED token, and the rows go in after it with
+    `recover` or not at all without. In the rendered program the string
+    would run on into the rows and end at the first quote there instead.
+
+    Args:
+        input_string: The program to lex.
+        tables: The relations and rows to add as facts.
+        recover: Keep lexing the program after an UNDEFINED token.
+        hidden: The token types to leave out of the output.
+        limits: The limits for lexing the program (see `project1.limits`).
+            The facts from `tables` do not count towards them.
+
+    Raises:
+        ValueError: if `hidden` includes EOF or UNDEFINED, a relation name is
+            not an ID or is a keyword, or the program has no Facts section.
+            The last is only found at its EOF, after the tokens before it.
+        LexLimitError: if lexing the program goes over one of `limits`.
+
+    Examples:
+        >>> from project1.tables import FactTable, lex_with_facts
+        >>> tables = [FactTable("f", [["x"]])]
+        >>> print(*lex_with_facts("Facts:\\nRules:", tables))
+        (FACTS,"Facts",1) (COLON,":",1) (ID,"f",2) (LEFT_PAREN,"(",2) (STRING,"'x'",2) (RIGHT_PAREN,")",2) (PERIOD,".",2) (RULES,"Rules",3) (COLON,":",3) (EOF,"",3)
+    """
+    hidden_types = _hidden_types(hidden)
+    # The program is lexed with nothing hidden to see where lines start.
+    program = (
+        lexer_bytes(input_string, recover, (), limits=limits)
+        if isinstance(input_string, bytes)
+        else lexer(input_string, recover, (), limits=limits)
+    )
+    whitespace = TokenType.WHITESPACE
+    facts_type = TokenType.FACTS
+    eof_type = TokenType.EOF
+    in_facts = done = False
+    shift = 0
+    previous: Token | None = None
+    for token in program:
+        token_type = token.token_type
+        if not done and (token_type in _SECTION_TYPES or token_type is eof_type):
+            if in_facts and previous is not None:
+                done = True
+                # A newline goes in first unless the token before ends a line.
+                newline = not previous.value.endswith("\n")
+                rows = _row_tokens(tables, token.line_num + newline)
+                first = next(rows, None)
+                if first is not None:
+                    if newline and previous.token_type is whitespace:
+                        previous = Token(
+                            whitespace, previous.value + "\n", previous.line_num
+                        )
+                    elif newline:
+                        if previous.token_type not in hidden_types:
+                            yield previous
+                        previous = Token.whitespace("\n").at_line(token.line_num)
+                    if previous.token_type not in hidden_types:
+                        yield previous
+                    previous = None
+                    last = first
+                    for last in itertools.chain([first], rows):
+                        if last.token_type not in hidden_types:
+                            yield last
+                    # The last row token is the newline that ends its line.
+                    shift = last.line_num + 1 - token.line_num
+            elif token_type is eof_type:
+                raise ValueError("the program has no Facts section to add facts to")
+            in_facts = token_type is facts_type
+        if previous is not None and previous.token_type not in hidden_types:
+            yield previous
+        previous = token if not shift else token.at_line(token.line_num + shift)
+    if previous is not None and previous.token_type not in hidden_types:
+        yield previous
@@ -6,53 +6,80 @@ maps a string to its syntactic type in the grammar. For example, the string
 allowed orders of the syntactic types that constitute valid Datalog syntax.
 This module defines the syntactic types for Datalog.
 
+Tokens are immutable: `at_line` returns a copy of a token on another line.
+Two tokens that are equal hash the same, so tokens can be dict keys or set
+members.
+
 Examples:
     >>> from project1.token import Token
-    >>> colon = Token.colon(":")
-    >>> colon.line_num = 10
+    >>> colon = Token.colon(":").at_line(10)
     >>> print(colon)
     (COLON,":",10)
-    >>> id = Token.id("id")
-    >>> id.line_num = 42
+    >>> id = Token.id("id").at_line(42)
     >>> print(id)
     (ID,"id",42)
+    >>> len({id, Token("ID", "id", 42), colon})
+    2
 """
 
+from enum import IntEnum
 from typing import Literal, Any
 
-TokenType = Literal[
-    "COLON",
-    "COLON_DASH",
-    "COMMA",
-    "COMMENT",
-    "UNDEFINED",
-    "EOF",
-    "FACTS",
-    "ID",
-    "LEFT_PAREN",
-    "PERIOD",
-    "QUERIES",
-    "Q_MARK",
-    "RIGHT_PAREN",
-    "RULES",
-    "SCHEMES",
-    "STRING",
-    "WHITESPACE",
-]
-"""
-`TokenType` is an algebraic data type, and more specifically, it is a
-"sum type". A sum type is a list of allowed types, or in this case,
-allowed string literals that belong to `TokenType`. The mypy tool uses
-`TokenType` to statically check that the string indicating the type of
-token to create belongs to the `TokenType` sum type. `TokenType`
-includes all the allowed syntactic types for the Datalog grammar.
-
-For more on algebraic types in Python see
-https://threeofwands.com/algebraic-data-types-in-python/
-"""
+
+class TokenType(IntEnum):
+    """The syntactic types for the Datalog grammar.
+
+    Each type is a small integer code, so the lexer compares and looks up
+    types as integers, and a column of types fits in an `array` of bytes.
+    The codes are the ones `project1.binary` writes, and new types must go
+    at the end to keep them. The names are used only for output: `name`
+    gives the name, and `TokenType.of("ID")` looks a type up by its name.
+
+    Examples:
+        >>> from project1.token import TokenType
+        >>> TokenType.ID, TokenType.of("ID"), TokenType.of(7)
+        (<TokenType.ID: 7>, <TokenType.ID: 7>, <TokenType.ID: 7>)
+        >>> TokenType.ID.name
+        'ID'
+    """
+
+    COLON = 0
+    COLON_DASH = 1
+    COMMA = 2
+    COMMENT = 3
+    UNDEFINED = 4
+    EOF = 5
+    FACTS = 6
+    ID = 7
+    LEFT_PAREN = 8
+    PERIOD = 9
+    QUERIES = 10
+    Q_MARK = 11
+    RIGHT_PAREN = 12
+    RULES = 13
+    SCHEMES = 14
+    STRING = 15
+    WHITESPACE = 16
+
+    @classmethod
+    def of(cls, value: "TokenType | str | int") -> "TokenType":
+        """Return the token type with the name or code `value`.
+
+        Raises:
+            ValueError: if no token type has that name or code.
+        """
+        if isinstance(value, str):
+            member = cls.__members__.get(value)
+            if member is None:
+                raise ValueError("{!r} is not a token type".format(value))
+            return member
+        return cls(value)
+
+
+_NAMES: tuple[str, ...] = tuple(i.name for i in TokenType)
 
 
-class Token:
+class Token(tuple[TokenType, str, int, int | None]):
     """Token class for Datalog.
 
     `Token` defines the allowed syntactic types for Datalog. Here a single
@@ -60,126 +87,178 @@ class Token:
     tokes identifies its type, the string value associated with it, and
     the line where it was found in the input.
 
+    A token is a tuple of its four attributes, so it cannot be changed once
+    made. Equality and hashing use the type, value and line number. Since
+    every attribute is immutable, `copy.copy` and `copy.deepcopy` return the
+    token itself, and a token pickles as just its class and attributes.
+
     Attributes:
         token_type (TokenType): The syntactic type of this token.
         value (str): The string associated with the token.
         line_num (int): The line number associated with the token -- where it starts in the input.
+        symbol_id (int | None): The id of the value in a `project1.symbols.SymbolTable`, if
+            the token was interned. It is not part of equality or the string form.
     """
 
-    __slots__ = ["token_type", "value", "line_num"]
+    __slots__ = ()
 
-    def __init__(self, token_type: TokenType, value: str, line_num: int = 0) -> None:
-        """Initialize a `Token` with its type, value, and line number.
+    def __new__(
+        cls,
+        token_type: TokenType | str,
+        value: str,
+        line_num: int = 0,
+        symbol_id: int | None = None,
+    ) -> "Token":
+        """Create a `Token` with its type, value, and line number.
 
         NOTE: use the static methods to create instances of `Token` rather than call
-        `__init__` directly (e.g., `Token.colon(":")`). See _Example_ in module docstring.
+        `Token` directly (e.g., `Token.colon(":")`). See _Example_ in module docstring.
 
         Args:
-            token_type: The type of this token.
+            token_type: The type of this token, or the name of the type.
             value: The value to use for this taken.
             line_num: The line number from the input where the token value begins.
+            symbol_id: The id of `value` in a symbol table, if interned.
         """
-        self.token_type: TokenType = token_type
-        self.value: str = value
-        self.line_num: int = line_num
+        if not isinstance(token_type, TokenType):
+            token_type = TokenType.of(token_type)
+        return tuple.__new__(cls, (token_type, value, line_num, symbol_id))
+
+    @property
+    def token_type(self) -> TokenType:
+        return self[0]
+
+    @property
+    def value(self) -> str:
+        return self[1]
+
+    @property
+    def line_num(self) -> int:
+        return self[2]
+
+    @property
+    def symbol_id(self) -> int | None:
+        return self[3]
+
+    def at_line(self, line_num: int) -> "Token":
+        """Return this token with its line number set to `line_num`."""
+        return tuple.__new__(Token, (self[0], self[1], line_num, self[3]))
 
     def __str__(self) -> str:
         """Return the string representation of the token
 
         This function makes it so that `str(token)` works as expected.
         """
-        return (
-            "(" + self.token_type + ',"' + self.value + '",' + str(self.line_num) + ")"
+        return "(" + _NAMES[self[0]] + ',"' + self[1] + '",' + str(self[2]) + ")"
+
+    def __repr__(self) -> str:
+        if self[3] is None:
+            return "Token({!r}, {!r}, {!r})".format(_NAMES[self[0]], self[1], self[2])
+        return "Token({!r}, {!r}, {!r}, {!r})".format(
+            _NAMES[self[0]], self[1], self[2], self[3]
         )
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, Token):
-            return (
-                self.token_type == other.token_type
-                and self.value == other.value
-                and self.line_num == other.line_num
-            )
+            return self[0] == other[0] and self[1] == other[1] and self[2] == other[2]
         return False
 
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash((self[0], self[1], self[2]))
+
+    def __reduce__(self) -> tuple[type["Token"], tuple[Any, ...]]:
+        if self[3] is None:
+            return Token, (int(self[0]), self[1], self[2])
+        return Token, (int(self[0]), self[1], self[2], self[3])
+
+    def __copy__(self) -> "Token":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Token":
+        return self
+
     @staticmethod
     def colon(value: Literal[":"]) -> "Token":
         """Create a COLON token with ':' as its value."""
-        return Token("COLON", value)
+        return Token(TokenType.COLON, value)
 
     @staticmethod
     def colon_dash(value: Literal[":-"]) -> "Token":
         """Create a "COLON_DASH token with ':-' as its value."""
-        return Token("COLON_DASH", value)
+        return Token(TokenType.COLON_DASH, value)
 
     @staticmethod
     def comma(value: Literal[","]) -> "Token":
         """Create a COMMA token with ',' as its value."""
-        return Token("COMMA", value)
+        return Token(TokenType.COMMA, value)
 
     @staticmethod
     def comment(value: str) -> "Token":
         """Create a COMMENT token with the input value as its value."""
-        return Token("COMMENT", value)
+        return Token(TokenType.COMMENT, value)
 
     @staticmethod
     def undefined(value: str) -> "Token":
         """Create an UNDEFINED token with the input value as its value."""
-        return Token("UNDEFINED", value)
+        return Token(TokenType.UNDEFINED, value)
 
     @staticmethod
     def eof(value: Literal[""]) -> "Token":
         """Create an EOF token."""
-        return Token("EOF", value)
+        return Token(TokenType.EOF, value)
 
     @staticmethod
     def facts(value: Literal["Facts"]) -> "Token":
         """Create a FACTS token with 'Facts' as its value."""
-        return Token("FACTS", value)
+        return Token(TokenType.FACTS, value)
 
     @staticmethod
     def id(value: str) -> "Token":
         """Create an ID token with the input value as its value."""
-        return Token("ID", value)
+        return Token(TokenType.ID, value)
 
     @staticmethod
     def left_paren(value: Literal["("]) -> "Token":
         """Create a LEFT_PAREN token with '(' as its value."""
-        return Token("LEFT_PAREN", value)
+        return Token(TokenType.LEFT_PAREN, value)
 
     @staticmethod
     def period(value: Literal["."]) -> "Token":
         """Create a PERIOD token with '.' as its value."""
-        return Token("PERIOD", value)
+        return Token(TokenType.PERIOD, value)
 
     @staticmethod
     def queries(value: Literal["Queries"]) -> "Token":
         """Create a QUERIES token with 'Queries' as its value."""
-        return Token("QUERIES", value)
+        return Token(TokenType.QUERIES, value)
 
     @staticmethod
     def q_mark(value: Literal["?"]) -> "Token":
         """Create a Q_MARK token with '?' as its value."""
-        return Token("Q_MARK", value)
+        return Token(TokenType.Q_MARK, value)
 
     @staticmethod
     def right_paren(value: Literal[")"]) -> "Token":
         """Create a RIGHT_PAREN token with ')' as its value."""
-        return Token("RIGHT_PAREN", value)
+        return Token(TokenType.RIGHT_PAREN, value)
 
     @staticmethod
     def rules(value: Literal["Rules"]) -> "Token":
         """Create a RULES token with 'Rules' as its value."""
-        return Token("RULES", value)
+        return Token(TokenType.RULES, value)
 
     @staticmethod
     def schemes(value: Literal["Schemes"]) -> "Token":
         """Create a SCHEMES token with 'Schemes' as its value."""
-        return Token("SCHEMES", value)
+        return Token(TokenType.SCHEMES, value)
 
     @staticmethod
     def string(value: str) -> "Token":
         """Create a STRING token with the input value as its value."""
-        return Token("STRING", value)
+        return Token(TokenType.STRING, value)
 
     @staticmethod
     def whitespace(value: str) -> "Token":
@@ -190,4 +269,4 @@ class Token:
         """
         for i in value:
             assert i == " " or i == "\t" or i == "\n" or i == "\r"
-        return Token("WHITESPACE", value)
+        return Token(TokenType.WHITESPACE, value)
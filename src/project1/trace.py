@@ -0,0 +1,121 @@
+"""State-transition tracing for FSM runs.
+
+Passing a sink as `trace` to `match_fsm`, `run_fsm` or `lexer` records one
+`TraceEvent` for every transition an FSM takes: the FSM, the state it was
+in, the character read, the characters read so far, and the next state.
+The sink decides what happens to each event: keep the most recent events
+(`RingBufferSink`), write them out (`FileSink`), hand them to a function
+(`CallbackSink`), or just count visits per state (`CountingSink`).
+
+Tracing is chosen once per FSM run: without a sink, `match_fsm` runs its
+usual loop with no per-character check, and a separate loop is used only
+when a sink is given.
+
+Examples:
+    >>> from project1.lexer import lexer
+    >>> from project1.trace import RingBufferSink, hot_counts
+    >>> sink = RingBufferSink()
+    >>> tokens = list(lexer("ab", trace=sink))
+    >>> [i for i in sink.events if i.fsm == "ID"][:2]
+    [TraceEvent(fsm='ID', state='ID.s_0', char='a', chars_read=0, next_state='ID.s_1'), TraceEvent(fsm='ID', state='ID.s_1', char='b', chars_read=1, next_state='ID.s_1')]
+    >>> hot_counts(sink.events)[("ID", "ID.s_1")]
+    2
+"""
+
+from collections import Counter, deque
+from typing import Callable, Iterable, NamedTuple, Protocol, TextIO
+
+
+class TraceEvent(NamedTuple):
+    """One FSM transition.
+
+    Attributes:
+        fsm (str): The class name of the FSM.
+        state (str): The qualified name of the state before the transition.
+        char (str): The character read, or "" at the end of the input.
+        chars_read (int): The number of characters read before this one.
+        next_state (str): The qualified name of the state after the transition.
+    """
+
+    fsm: str
+    state: str
+    char: str
+    chars_read: int
+    next_state: str
+
+
+class TraceSink(Protocol):
+    """Anything that can receive trace events."""
+
+    def record(self, event: TraceEvent) -> None: ...
+
+
+class RingBufferSink:
+    """Keep the most recent `capacity` events in memory.
+
+    Attributes:
+        events (deque[TraceEvent]): The recorded events, oldest first.
+    """
+
+    __slots__ = ["events"]
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self.events: deque[TraceEvent] = deque(maxlen=capacity)
+
+    def record(self, event: TraceEvent) -> None:
+        self.events.append(event)
+
+
+class FileSink:
+    """Write each event as a tab-separated line to a text stream.
+
+    The character is written with `repr` so that whitespace stays visible.
+    """
+
+    __slots__ = ["_stream"]
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+
+    def record(self, event: TraceEvent) -> None:
+        self._stream.write(
+            "{}\t{}\t{!r}\t{}\t{}\n".format(
+                event.fsm, event.state, event.char, event.chars_read, event.next_state
+            )
+        )
+
+
+class CallbackSink:
+    """Pass each event to a function."""
+
+    __slots__ = ["_callback"]
+
+    def __init__(self, callback: Callable[[TraceEvent], None]) -> None:
+        self._callback = callback
+
+    def record(self, event: TraceEvent) -> None:
+        self._callback(event)
+
+
+class CountingSink:
+    """Count how often each (FSM, state) pair runs without keeping the events.
+
+    Attributes:
+        counts (Counter[tuple[str, str]]): Visits per (FSM, state) pair.
+    """
+
+    __slots__ = ["counts"]
+
+    def __init__(self) -> None:
+        self.counts: Counter[tuple[str, str]] = Counter()
+
+    def record(self, event: TraceEvent) -> None:
+        self.counts[(event.fsm, event.state)] += 1
+
+
+def hot_counts(events: Iterable[TraceEvent]) -> Counter[tuple[str, str]]:
+    """Count the visits to each (FSM, state) pair in `events`.
+
+    Use `most_common()` on the result to list the hottest states first.
+    """
+    return Counter((i.fsm, i.state) for i in events)
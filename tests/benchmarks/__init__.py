@@ -0,0 +1 @@
+"""Throughput scripts, run as modules rather than collected as tests."""
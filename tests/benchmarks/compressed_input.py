@@ -0,0 +1,76 @@
+"""Reading and lexing compressed input against the same file uncompressed.
+
+A generated program is written to a temporary directory as is and
+compressed with gzip, bz2 and xz. For each file the benchmark times reading
+its text with `read_chunks` alone and then lexing it with `lex_chunks`, so
+the cost of decompression can be told apart from the cost of lexing.
+
+Run from the repository root:
+
+    python -m tests.benchmarks.compressed_input --facts 20000 --repeat 3
+"""
+
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import time
+from typing import Callable
+
+from project1.pipeline import lex_chunks, read_chunks
+from tests.passoff_utils import generated_program
+
+_FORMATS: dict[str, Callable[[bytes], bytes]] = {
+    "plain": lambda data: data,
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "xz": lzma.compress,
+}
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def run(num_facts: int, repeat: int) -> None:
+    """Print file size, read time and read plus lex time for each format."""
+    data = generated_program(num_facts).encode()
+    print("{:>6} {:>12} {:>10} {:>10}".format("format", "bytes", "read s", "lex s"))
+    with tempfile.TemporaryDirectory() as directory:
+        for name, compress in _FORMATS.items():
+            path = os.path.join(directory, "input." + name)
+            with open(path, "wb") as f:
+                f.write(compress(data))
+
+            def read(path: str = path) -> None:
+                for _ in read_chunks(path):
+                    pass
+
+            def lex(path: str = path) -> None:
+                for _ in lex_chunks(read_chunks(path)):
+                    pass
+
+            print(
+                "{:>6} {:>12,} {:>10.3f} {:>10.3f}".format(
+                    name, os.path.getsize(path), _best(read, repeat), _best(lex, repeat)
+                )
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="compressed_input", description=__doc__)
+    parser.add_argument("--facts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.facts, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
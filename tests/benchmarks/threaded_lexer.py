@@ -0,0 +1,58 @@
+"""Lexer throughput against thread count.
+
+Every thread lexes its own copy of a generated program over and over, all of
+them sharing the lexer's FSM instances. On a free-threaded build of CPython
+(3.13t and later, with the GIL off) throughput should grow with the number
+of threads; with the GIL it stays flat, which is the baseline to compare
+against.
+
+Run from the repository root:
+
+    python -m tests.benchmarks.threaded_lexer --facts 500 --rounds 4 --threads 1 2 4 8
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from project1.lexer import lexer
+from tests.passoff_utils import generated_program
+
+
+def _lex(input_string: str, rounds: int) -> int:
+    count = 0
+    for _ in range(rounds):
+        for _ in lexer(input_string):
+            count += 1
+    return count
+
+
+def run(num_facts: int, rounds: int, threads: list[int]) -> None:
+    """Print tokens per second and speedup over one thread for each thread count."""
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("Python {} GIL {}".format(sys.version.split()[0], "on" if gil else "off"))
+    print("{:>8} {:>14} {:>8}".format("threads", "tokens/s", "speedup"))
+    base = None
+    for num_threads in threads:
+        inputs = [generated_program(num_facts) for _ in range(num_threads)]
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            begin = time.perf_counter()
+            counts = list(pool.map(_lex, inputs, [rounds] * num_threads))
+            elapsed = time.perf_counter() - begin
+        rate = sum(counts) / elapsed
+        base = base or rate
+        print("{:>8} {:>14,.0f} {:>7.2f}x".format(num_threads, rate, rate / base))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="threaded_lexer", description=__doc__)
+    parser.add_argument("--facts", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    run(args.facts, args.rounds, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 # type: ignore
+import glob
 import os
-from project1.project1 import project1 as compute  # type: ignore[import-untyped]
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator
+
+from project1.project1 import project1_lines as compute  # type: ignore[import-untyped]
 
 
 _TEST_FUNC = compute
@@ -9,6 +14,7 @@ _ANSWER_PREFIX = "answer"
 _ANSWER_EXTENSION = ".txt"
 _INPUT_PREFIX = "input"
 _INPUT_EXTENSION = ".txt"
+_CONTEXT_LINES = 3
 
 
 def _get_file_paths(bucket: int, test_index: int) -> tuple[str, str]:
@@ -20,19 +26,152 @@ def _get_file_paths(bucket: int, test_index: int) -> tuple[str, str]:
     return input_file, answer_file
 
 
-def _get_inputs(input_file: str, answer_file: str) -> tuple[str, str]:
+passoff_inputs = sorted(
+    glob.glob(_TEST_ROOT_DIR + "*/" + _INPUT_PREFIX + "*" + _INPUT_EXTENSION)
+)
+
+
+def read_input(input_file: str) -> str:
     input = ""
     with open(input_file, "r") as f:
         input = f.read()
-    answer = ""
+    return input
+
+
+def _is_blank(lines: Iterable[str]) -> bool:
+    return all(i.strip() == "" for i in lines)
+
+
+def _format_divergence(
+    index: int,
+    before: Iterable[str],
+    expected: list[str | None],
+    actual: list[str | None],
+) -> str:
+    def show(line: str | None) -> str:
+        return "<end of output>" if line is None else repr(line)
+
+    start = index - len(before)
+    report = ["first difference at output line {}".format(index + 1)]
+    for offset, line in enumerate(before):
+        report.append("    {:>8}  {}".format(start + offset + 1, show(line)))
+    report.append("  expected:")
+    for offset, line in enumerate(expected):
+        report.append("    {:>8}  {}".format(index + offset + 1, show(line)))
+    report.append("  actual:")
+    for offset, line in enumerate(actual):
+        report.append("    {:>8}  {}".format(index + offset + 1, show(line)))
+    return "\n".join(report)
+
+
+def compare_lines(
+    expected: Iterable[str], actual: Iterable[str], context: int = _CONTEXT_LINES
+) -> int:
+    """Compare two line streams and stop at the first difference.
+
+    Neither stream is materialized: lines are pulled one at a time and only
+    the last `context` matching lines are kept for the failure report. As
+    with comparing `rstrip()` of the whole text, trailing whitespace at the
+    end of either stream is ignored.
+
+    Returns:
+        count: the number of lines compared.
+
+    Raises:
+        AssertionError: at the first differing line, reporting its index with
+            the lines around it from both streams.
+    """
+    expected_lines = iter(expected)
+    actual_lines = iter(actual)
+    before: deque[str] = deque(maxlen=context)
+    index = 0
+    while True:
+        e = next(expected_lines, None)
+        a = next(actual_lines, None)
+        if e is None and a is None:
+            return index
+        if e != a:
+            break
+        before.append(e)
+        index += 1
+
+    following_e = list(islice(expected_lines, context))
+    following_a = list(islice(actual_lines, context))
+    if (
+        (e or "").rstrip() == (a or "").rstrip()
+        and _is_blank(following_e)
+        and _is_blank(following_a)
+        and _is_blank(expected_lines)
+        and _is_blank(actual_lines)
+    ):
+        return index
+    raise AssertionError(
+        _format_divergence(index, before, [e] + following_e, [a] + following_a)
+    )
+
+
+def _answer_lines(answer_file: str) -> Iterator[str]:
     with open(answer_file, "r") as f:
-        answer = f.read()
-    return input, answer
+        for line in f:
+            yield line.rstrip("\n")
 
 
 def passoff(bucket: int, test_index: int) -> None:
     input_path, answer_path = _get_file_paths(bucket, test_index)
-    input, answer = _get_inputs(input_path, answer_path)
+    input = read_input(input_path)
+
+    compare_lines(_answer_lines(answer_path), _TEST_FUNC(input))
+
+
+def generated_program(num_facts: int) -> str:
+    """Return a valid Datalog program with `num_facts` facts.
+
+    The expected output for the program comes from `generated_answer` without
+    running the lexer, so the pass-off comparison can be run on inputs of any
+    size.
+    """
+    lines = [
+        "# generated program",
+        "Schemes:",
+        "  snap(S,N)",
+        "Facts:",
+    ]
+    lines.extend("  snap('{}','it''s {}').".format(i, i) for i in range(num_facts))
+    lines.extend(["Rules:", "  a(X):-snap(X,Y).", "Queries:", "  a('0')?", ""])
+    return "\n".join(lines)
+
+
+def _token_lines(tokens: list[tuple[str, str]], line: int) -> Iterator[str]:
+    for token_type, value in tokens:
+        yield '({},"{}",{})'.format(token_type, value, line)
+
+
+def generated_answer(num_facts: int) -> Iterator[str]:
+    """Yield the expected output lines for `generated_program(num_facts)`."""
+    yield from _token_lines([("COMMENT", "# generated program")], 1)
+    yield from _token_lines([("SCHEMES", "Schemes"), ("COLON", ":")], 2)
+    scheme = [("ID", "snap"), ("LEFT_PAREN", "("), ("ID", "S"), ("COMMA", ",")]
+    scheme += [("ID", "N"), ("RIGHT_PAREN", ")")]
+    yield from _token_lines(scheme, 3)
+    yield from _token_lines([("FACTS", "Facts"), ("COLON", ":")], 4)
+    for i in range(num_facts):
+        fact = [("ID", "snap"), ("LEFT_PAREN", "("), ("STRING", "'{}'".format(i))]
+        fact += [("COMMA", ","), ("STRING", "'it''s {}'".format(i))]
+        fact += [("RIGHT_PAREN", ")"), ("PERIOD", ".")]
+        yield from _token_lines(fact, i + 5)
+    line = num_facts + 5
+    yield from _token_lines([("RULES", "Rules"), ("COLON", ":")], line)
+    rule = [("ID", "a"), ("LEFT_PAREN", "("), ("ID", "X"), ("RIGHT_PAREN", ")")]
+    rule += [("COLON_DASH", ":-"), ("ID", "snap"), ("LEFT_PAREN", "("), ("ID", "X")]
+    rule += [("COMMA", ","), ("ID", "Y"), ("RIGHT_PAREN", ")"), ("PERIOD", ".")]
+    yield from _token_lines(rule, line + 1)
+    yield from _token_lines([("QUERIES", "Queries"), ("COLON", ":")], line + 2)
+    query = [("ID", "a"), ("LEFT_PAREN", "("), ("STRING", "'0'")]
+    query += [("RIGHT_PAREN", ")"), ("Q_MARK", "?")]
+    yield from _token_lines(query, line + 3)
+    yield from _token_lines([("EOF", "")], line + 4)
+    yield "Total Tokens = {}".format(7 * num_facts + 33)
+
 
-    result = _TEST_FUNC(input)
-    assert answer.rstrip() == result.rstrip()
+def passoff_generated(num_facts: int) -> None:
+    compare_lines(generated_answer(num_facts), _TEST_FUNC(generated_program(num_facts)))
@@ -0,0 +1,101 @@
+# type: ignore
+import random
+
+import pytest
+
+from project1.ascii_lexer import is_ascii, lexer_bytes
+from project1.lexer import lexer
+from project1.project1 import project1, project1cli
+from tests.passoff_utils import passoff_inputs, read_input
+
+
+@pytest.mark.parametrize("recover", [False, True], ids=["default", "recover"])
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_lexer_bytes_then_match_lexer(path, recover):
+    # given
+    input = read_input(path)
+
+    # when
+    result = list(lexer_bytes(input.encode(), recover))
+
+    # then
+    assert list(lexer(input, recover)) == result
+
+
+# fmt: off
+_ALPHABET = [
+    " ", "\t", "\r", "\n", ",", ".", "?", "(", ")", ":", "-", "#", "'", "''",
+    "a", "Z", "7", "Facts", "Rules", "Queries", "Schemes", "Factsx", "!", "\x0b",
+]
+# fmt: on
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_given_random_input_when_lexer_bytes_then_match_lexer(seed):
+    # given
+    rng = random.Random(seed)
+    input = "".join(rng.choice(_ALPHABET) for _ in range(300))
+
+    # when
+    result = list(lexer_bytes(input.encode(), recover=True))
+
+    # then
+    assert list(lexer(input, recover=True)) == result
+
+
+def test_given_memoryview_when_lexer_bytes_then_match_lexer():
+    # given
+    input = read_input(passoff_inputs[0])
+
+    # when
+    result = list(lexer_bytes(memoryview(input.encode())))
+
+    # then
+    assert list(lexer(input)) == result
+
+
+def test_given_non_ascii_when_lexer_bytes_then_fall_back_to_lexer():
+    # given
+    input = "Facts: été('ü').\n¼"
+
+    # when
+    result = list(lexer_bytes(input.encode(), recover=True))
+
+    # then
+    assert not is_ascii(input.encode())
+    assert not is_ascii(memoryview(input.encode()))
+    assert list(lexer(input, recover=True)) == result
+
+
+def test_given_crlf_file_when_cli_then_match_text_mode(tmp_path, monkeypatch, capsys):
+    # given
+    input = "# c\r\nFacts:\r\n a('x\r\ny').\r"
+    path = tmp_path / "t.txt"
+    path.write_bytes(input.encode())
+    monkeypatch.setattr("sys.argv", ["project1", str(path)])
+
+    # when
+    project1cli()
+
+    # then
+    with open(path, "r") as f:
+        expected = project1(f.read())
+    assert expected + "\n" == capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "hidden",
+    [[], ["WHITESPACE", "COMMENT"], ["STRING", "ID", "COLON_DASH"]],
+    ids=["none", "whitespace-comment", "string-id-colon-dash"],
+)
+@pytest.mark.parametrize("seed", range(5))
+def test_given_hidden_types_when_lexer_bytes_then_match_lexer(seed, hidden):
+    # given
+    rng = random.Random(seed)
+    input = "".join(rng.choice(_ALPHABET) for _ in range(300))
+
+    # when
+    result = list(lexer_bytes(input.encode(), True, hidden))
+
+    # then
+    assert list(lexer(input, True, hidden)) == result
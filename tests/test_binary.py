@@ -0,0 +1,116 @@
+# type: ignore
+import io
+
+import pytest
+
+from project1.binary import (
+    BinaryFormatError,
+    MAGIC,
+    load_tokens,
+    read_tokens,
+    write_tokens,
+)
+from project1.lexer import lexer
+from project1.token import Token
+from tests.passoff_utils import passoff_inputs, read_input
+
+
+@pytest.mark.parametrize("recover", [False, True], ids=["default", "recover"])
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_round_trip_then_match_tokens(path, recover):
+    # given
+    expected = list(lexer(read_input(path), recover))
+    buffer = io.BytesIO()
+
+    # when
+    count = write_tokens(iter(expected), buffer)
+    result = list(read_tokens(buffer.getvalue()))
+
+    # then
+    assert len(expected) == count
+    assert expected == result
+
+
+def test_given_repeated_values_when_write_then_store_each_string_once():
+    # given
+    tokens = [Token("STRING", "'1234'", i) for i in range(1, 1001)]
+    buffer = io.BytesIO()
+
+    # when
+    write_tokens(tokens, buffer)
+
+    # then
+    assert 1 == buffer.getvalue().count(b"'1234'")
+    assert len(buffer.getvalue()) < 4 * len(tokens)
+
+
+def test_given_file_when_load_tokens_then_match_tokens(tmp_path):
+    # given
+    expected = list(lexer(read_input(passoff_inputs[0])))
+    path = tmp_path / "tokens.bin"
+    with open(path, "wb") as f:
+        write_tokens(expected, f)
+
+    # when
+    result = list(load_tokens(str(path)))
+
+    # then
+    assert expected == result
+
+
+def test_given_decreasing_lines_when_write_then_raise():
+    # given
+    tokens = [Token("COLON", ":", 2), Token("COLON", ":", 1)]
+
+    # when/then
+    with pytest.raises(ValueError):
+        write_tokens(tokens, io.BytesIO())
+
+
+bad_inputs = [
+    b"",
+    b"NOPE\x01\xff\x00",
+    MAGIC + b"\x02\xff\x00",
+    MAGIC + b"\x01\x00\x01\x00\x01",
+    MAGIC + b"\x01\x00\x01\x00\x01:",
+    MAGIC + b"\x01\x00\x01\x00\x01:\xff\x02",
+    MAGIC + b"\x01\x40\x01\x00\x01:\xff\x01",
+    MAGIC + b"\x01\x00\x01\x00\x01\xff\xff\x01",
+]
+bad_ids = [
+    "empty",
+    "magic",
+    "version",
+    "truncated-string",
+    "missing-trailer",
+    "wrong-count",
+    "bad-type-code",
+    "bad-utf-8",
+]
+
+
+@pytest.mark.parametrize("data", bad_inputs, ids=bad_ids)
+def test_given_malformed_stream_when_read_then_raise(data):
+    # given
+    # data
+
+    # when/then
+    with pytest.raises(BinaryFormatError):
+        list(read_tokens(data))
+
+
+def test_given_file_when_cli_binary_then_write_binary_stream(
+    tmp_path, monkeypatch, capsysbinary
+):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text("a(b).\n!")
+    monkeypatch.setattr("sys.argv", ["project1", "--format=binary", str(path)])
+    from project1.project1 import project1cli
+
+    # when
+    project1cli()
+    result = list(read_tokens(capsysbinary.readouterr().out))
+
+    # then
+    assert list(lexer("a(b).\n!")) == result
@@ -0,0 +1,206 @@
+# type: ignore
+import gzip
+import io
+
+import pytest
+
+from project1.binary import BinaryFormatError
+from project1.checkpoints import (
+    Checkpoint,
+    build_index,
+    lex_lines,
+    read_index,
+    write_index,
+)
+from project1.lexer import lexer
+from project1.project1 import project1, project1cli
+from tests.passoff_utils import generated_program, passoff_inputs, read_input
+
+
+def _full_lex(path, recover):
+    return list(lexer(read_input(path), recover))
+
+
+def _ranges(num_lines):
+    for first in range(1, num_lines + 2):
+        yield first, first
+        yield first, first + 2
+
+
+@pytest.mark.parametrize("recover", [False, True], ids=["stop", "recover"])
+@pytest.mark.parametrize("every", [1, 3])
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_lex_lines_then_match_full_lex(path, every, recover):
+    # given
+    tokens = _full_lex(path, recover)
+    index = build_index(path, every)
+
+    # when
+    results = {
+        i: list(lex_lines(path, index, *i, recover))
+        for i in _ranges(tokens[-1].line_num)
+    }
+
+    # then
+    for (first, last), result in results.items():
+        assert [i for i in tokens if first <= i.line_num <= last] == result
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"a\r\nb\r\n'x\r\ny'\r\nc\r\nd\r\n",
+        "Facts: f('éé').\n# è\ng('ê').\nh(x).\n".encode("utf-8"),
+        b"a\rb\r\rc\n'd\n\ne' f\n",
+    ],
+    ids=["crlf", "utf-8", "cr"],
+)
+def test_given_translated_or_multibyte_file_when_lex_lines_then_match_full_lex(
+    tmp_path, content
+):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_bytes(content)
+    tokens = _full_lex(path, True)
+    index = build_index(str(path), 1)
+
+    # when
+    results = {i: list(lex_lines(str(path), index, *i, True)) for i in _ranges(6)}
+
+    # then
+    for (first, last), result in results.items():
+        assert [i for i in tokens if first <= i.line_num <= last] == result
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"a\r\nb\r\n'x\r\ny'\r\nc\r\nd\r\n! e\r",
+        "Facts: f('éé').\n# è\ng('ê').\n#| ü\r\n |# h(x).\n".encode("utf-8"),
+        b"a\rb\r\rc\n'd\n\ne' f\n$ g",
+    ],
+    ids=["crlf", "utf-8", "cr"],
+)
+def test_given_small_chunks_when_build_index_then_same_index(
+    tmp_path, content, chunk_size
+):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_bytes(content)
+
+    # when
+    index = build_index(str(path), 1, chunk_size)
+
+    # then
+    assert build_index(str(path), 1) == index
+    assert index.first_error is not None
+
+
+def test_given_gzip_file_when_lex_lines_then_match_full_lex(tmp_path):
+    # given
+    input_string = generated_program(50)
+    path = tmp_path / "t.dl.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(input_string)
+    index = build_index(str(path), 10)
+
+    # when
+    result = list(lex_lines(str(path), index, 31, 33))
+
+    # then
+    expected = [i for i in lexer(input_string) if 31 <= i.line_num <= 33]
+    assert expected == result
+    assert 1 < len(index.checkpoints)
+
+
+def test_given_error_when_not_recover_then_never_resume_past_it(tmp_path):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text("a\nb\n!\nc\nd\n")
+    index = build_index(str(path), 1)
+
+    # when
+    stopped = list(lex_lines(str(path), index, 4, 5))
+    recovered = list(lex_lines(str(path), index, 4, 5, recover=True))
+
+    # then
+    assert 4 == index.first_error
+    assert Checkpoint(3, 4) == index.checkpoint_for(5)
+    assert [] == stopped
+    assert ["c", "d"] == [i.value for i in recovered]
+
+
+def test_given_index_when_write_and_read_then_same_index(tmp_path):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text(generated_program(30))
+    index = build_index(str(path), 7)
+    stream = io.BytesIO()
+
+    # when
+    count = write_index(index, stream)
+
+    # then
+    assert len(index.checkpoints) == count
+    assert index == read_index(stream.getvalue())
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"P1SY\x01",
+        b"P1IX\x02",
+        b"P1IX\x01\x05\x10\x00\x02\x01",
+        b"P1IX\x01\x05\x10\x00\x01\x02\x00",
+    ],
+    ids=["empty", "magic", "version", "truncated", "not-line-1"],
+)
+def test_given_bad_data_when_read_index_then_error(data):
+    # when, then
+    with pytest.raises(BinaryFormatError):
+        read_index(data)
+
+
+def test_given_changed_file_when_lex_lines_then_error(tmp_path):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text("a\nb\n")
+    index = build_index(str(path))
+    path.write_text("a\nbc\n")
+
+    # when, then
+    with pytest.raises(ValueError):
+        list(lex_lines(str(path), index, 1, 2))
+
+
+def test_given_index_when_cli_lines_then_match_full_output(
+    tmp_path, monkeypatch, capsys
+):
+    # given
+    input_string = generated_program(40)
+    path = tmp_path / "t.txt"
+    path.write_text(input_string)
+    index_path = tmp_path / "t.idx"
+    monkeypatch.setattr(
+        "sys.argv",
+        ["project1", "--write-index", str(index_path), "--index-every", "8", str(path)],
+    )
+    project1cli()
+    monkeypatch.setattr(
+        "sys.argv",
+        ["project1", "--index", str(index_path), "--lines", "20:25", str(path)],
+    )
+
+    # when
+    project1cli()
+
+    # then
+    lines = project1(input_string).split("\n")
+    expected = [
+        i
+        for i in lines
+        if i.startswith("(") and 20 <= int(i.rsplit(",", 1)[1][:-1]) <= 25
+    ]
+    assert "".join(i + "\n" for i in expected) == capsys.readouterr().out
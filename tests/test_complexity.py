@@ -0,0 +1,158 @@
+# type: ignore
+"""Check that the lexer pipeline scales linearly with the size of its input.
+
+Each target runs on generated programs whose size doubles from one step to
+the next. Fact-only programs go through the whole-fact fast path of the
+lexer, so programs made mostly of rules and queries, with comments, strings
+and mixed punctuation, are timed as well to cover the FSMs. The growth exponent is the least-squares slope of log(cost)
+against log(size): linear work gives about 1 and quadratic work about 2.
+Timings take the best of several trials to filter out machine noise, on
+inputs large enough that even the smallest takes tens of milliseconds. A fit
+over the limit is measured again, keeping the best time for each size, so a
+burst of noise during one round does not fail the test. The limit sits well
+above 1 so that only clearly super-linear scaling fails.
+"""
+
+import math
+import time
+import tracemalloc
+
+import pytest
+
+from project1.lexer import lexer
+from project1.project1 import project1, project1cli
+from tests.passoff_utils import generated_program
+
+
+def _rules_program(num_rules):
+    """Return a valid Datalog program with `num_rules` rules and as many queries."""
+    lines = ["# generated rules", "Schemes:", "  snap(S,N)", "Facts:", "Rules:"]
+    lines.extend(
+        "  r{0}(X,Y) :- snap(X,'s{0}'), q(Y,Z). # rule {0}".format(i)
+        for i in range(num_rules)
+    )
+    lines.append("Queries:")
+    lines.extend(
+        "  #| query {0} |# r{0}(X,'it''s {0}')?".format(i) for i in range(num_rules)
+    )
+    lines.append("")
+    return "\n".join(lines)
+
+
+_PROGRAMS = {
+    "facts": (generated_program, [1000, 2000, 4000, 8000], [400, 800, 1600, 3200]),
+    "rules": (_rules_program, [250, 500, 1000, 2000], [100, 200, 400, 800]),
+}
+"""
+For each kind of program, its generator and the sizes to time, about 50 ms
+and up, and the smaller sizes to trace memory for, as tracing is slow.
+"""
+_TRIALS = 3
+_ROUNDS = 3
+_MAX_TIME_EXPONENT = 1.35
+_MAX_MEMORY_EXPONENT = 1.2
+
+
+def _run_lexer(input_string):
+    for _ in lexer(input_string):
+        pass
+
+
+def _run_project1(input_string):
+    project1(input_string)
+
+
+def _make_run_cli(tmp_path, monkeypatch):
+    def run_cli(input_string):
+        path = tmp_path / "input.txt"
+        path.write_text(input_string)
+        monkeypatch.setattr("sys.argv", ["project1", str(path)])
+        with open(tmp_path / "output.txt", "w") as out:
+            monkeypatch.setattr("sys.stdout", out)
+            project1cli()
+
+    return run_cli
+
+
+def _exponent(sizes, costs):
+    xs = [math.log(i) for i in sizes]
+    ys = [math.log(max(i, 1e-9)) for i in costs]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    den = sum((x - mean_x) ** 2 for x in xs)
+    return num / den
+
+
+def _best_time(func, input_string):
+    best = math.inf
+    for _ in range(_TRIALS):
+        start = time.perf_counter()
+        func(input_string)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(func, input_string):
+    tracemalloc.start()
+    try:
+        func(input_string)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@pytest.fixture
+def targets(tmp_path, monkeypatch):
+    return {
+        "lexer": _run_lexer,
+        "project1": _run_project1,
+        "cli": _make_run_cli(tmp_path, monkeypatch),
+    }
+
+
+@pytest.mark.parametrize("program", ["facts", "rules"])
+@pytest.mark.parametrize("target", ["lexer", "project1", "cli"])
+def test_given_doubling_input_when_run_then_time_grows_linearly(
+    targets, target, program
+):
+    # given
+    func = targets[target]
+    generate, sizes, _ = _PROGRAMS[program]
+    inputs = [generate(i) for i in sizes]
+    func(inputs[0])
+
+    # when
+    times = [_best_time(func, i) for i in inputs]
+    exponent = _exponent([len(i) for i in inputs], times)
+    for _ in range(_ROUNDS - 1):
+        if exponent < _MAX_TIME_EXPONENT:
+            break
+        times = [min(t, _best_time(func, i)) for t, i in zip(times, inputs)]
+        exponent = _exponent([len(i) for i in inputs], times)
+
+    # then
+    assert exponent < _MAX_TIME_EXPONENT, "time grows as n^{:.2f}: {}".format(
+        exponent, times
+    )
+
+
+@pytest.mark.parametrize("program", ["facts", "rules"])
+@pytest.mark.parametrize("target", ["lexer", "project1", "cli"])
+def test_given_doubling_input_when_run_then_memory_grows_linearly(
+    targets, target, program
+):
+    # given
+    func = targets[target]
+    generate, _, sizes = _PROGRAMS[program]
+    inputs = [generate(i) for i in sizes]
+
+    # when
+    peaks = [_peak_memory(func, i) for i in inputs]
+
+    # then
+    exponent = _exponent([len(i) for i in inputs], peaks)
+    assert exponent < _MAX_MEMORY_EXPONENT, "memory grows as n^{:.2f}: {}".format(
+        exponent, peaks
+    )
@@ -0,0 +1,119 @@
+# type: ignore
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from project1.compressed import detect_compression, open_input
+from project1.pipeline import read_chunks
+from project1.project1 import project1, project1cli
+from tests.passoff_utils import generated_program
+
+formats = [("gzip", gzip.compress), ("bz2", bz2.compress), ("xz", lzma.compress)]
+format_ids = [i for i, _ in formats]
+
+
+@pytest.mark.parametrize("name, compress", formats, ids=format_ids)
+def test_given_compressed_file_when_open_input_then_decompress(
+    tmp_path, name, compress
+):
+    # given
+    path = tmp_path / "t.dl"
+    path.write_bytes(compress(b"Facts: a('b')."))
+
+    # when
+    with open_input(str(path)) as f:
+        result = f.read()
+
+    # then
+    assert name == detect_compression(str(path))
+    assert b"Facts: a('b')." == result
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"B", b"BZ", b"Facts:"], ids=["empty", "b", "bz", "plain"]
+)
+def test_given_plain_file_when_open_input_then_read_as_is(tmp_path, data):
+    # given
+    path = tmp_path / "t.dl"
+    path.write_bytes(data)
+
+    # when
+    with open_input(str(path)) as f:
+        result = f.read()
+
+    # then
+    assert detect_compression(str(path)) is None
+    assert data == result
+
+
+@pytest.mark.parametrize("name, compress", formats, ids=format_ids)
+def test_given_compressed_file_when_read_chunks_then_translate_newlines(
+    tmp_path, name, compress
+):
+    # given
+    path = tmp_path / "t.dl"
+    path.write_bytes(compress(b"a\r\nb\rc\n" * 50))
+
+    # when
+    chunks = list(read_chunks(str(path), chunk_size=16))
+
+    # then
+    assert "a\nb\nc\n" * 50 == "".join(chunks)
+
+
+@pytest.mark.parametrize("pipeline", [False, True], ids=["whole", "pipeline"])
+@pytest.mark.parametrize("name, compress", formats, ids=format_ids)
+def test_given_compressed_file_when_cli_then_match_uncompressed(
+    tmp_path, monkeypatch, capsys, name, compress, pipeline
+):
+    # given
+    input_string = generated_program(50)
+    path = tmp_path / "t.dl"
+    path.write_bytes(compress(input_string.encode()))
+    flags = ["--pipeline"] if pipeline else []
+    monkeypatch.setattr("sys.argv", ["project1", *flags, str(path)])
+
+    # when
+    project1cli()
+
+    # then
+    assert project1(input_string) + "\n" == capsys.readouterr().out
+
+
+@pytest.mark.parametrize("pipeline", [False, True], ids=["whole", "pipeline"])
+@pytest.mark.parametrize(
+    "name, damage",
+    [
+        ("gzip", lambda data: data[:-20]),
+        ("xz", lambda data: data[:-20]),
+        ("bz2", lambda data: data[:-20]),
+        ("gzip", lambda data: data[:20] + b"\xff" * 40 + data[60:]),
+        ("xz", lambda data: data[:40] + b"\xff" * 40 + data[80:]),
+    ],
+    ids=[
+        "gzip-truncated",
+        "xz-truncated",
+        "bz2-truncated",
+        "gzip-corrupt",
+        "xz-corrupt",
+    ],
+)
+def test_given_damaged_compressed_file_when_cli_then_exit_with_message(
+    tmp_path, monkeypatch, capsys, name, damage, pipeline
+):
+    # given
+    compress = dict(formats)[name]
+    path = tmp_path / "t.dl"
+    path.write_bytes(damage(compress(generated_program(50).encode())))
+    flags = ["--pipeline"] if pipeline else []
+    monkeypatch.setattr("sys.argv", ["project1", *flags, str(path)])
+
+    # when
+    with pytest.raises(SystemExit) as exit:
+        project1cli()
+
+    # then
+    assert 2 == exit.value.code
+    assert capsys.readouterr().err.startswith("project1: ")
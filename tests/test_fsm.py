@@ -1,5 +1,21 @@
 # type: ignore
-from project1.fsm import run_fsm, Colon, WhiteSpace, Eof
+import pytest
+
+from project1.fsm import (
+    lockstep_plan,
+    run_fsm,
+    run_fsms,
+    match_fsm,
+    FiniteStateMachine,
+    Colon,
+    ColonDash,
+    WhiteSpace,
+    Eof,
+    Comment,
+    String,
+    ID,
+)
+from project1.lexer import FSMS
 from project1.token import Token
 
 
@@ -76,3 +92,125 @@ class TestWhiteSpace:
         # then
         assert 13 == number_chars_read
         assert str(Token.whitespace(" \r\n\r\n \n \t \t  ")) == str(token)
+
+
+class TestMatchFsm:
+    def test_given_start_when_match_then_read_from_start(self):
+        # given
+        whitespace = WhiteSpace()
+        input_string = "ab \n\t cd"
+
+        # when
+        number_chars_read = match_fsm(whitespace, input_string, 2)
+
+        # then
+        assert 4 == number_chars_read
+
+    def test_given_input_when_match_then_agree_with_run(self):
+        # given
+        colon = Colon()
+        input_string = ":: a"
+
+        # when
+        number_chars_read = match_fsm(colon, input_string)
+
+        # then
+        assert run_fsm(colon, input_string)[0] == number_chars_read
+
+
+bulk_inputs = [
+    "",
+    "# note\n# more",
+    "#",
+    "'a''b' 'c'",
+    "'it''s",
+    "'a\nb'''",
+    "''''",
+    " \t\r\n x \n",
+    "ab12 Facts",
+    "a9é² b",
+    "éa_b",
+    "1a",
+]
+
+
+@pytest.mark.parametrize(
+    "fsm", [Comment(), String(), WhiteSpace(), ID()], ids=lambda i: type(i).__name__
+)
+@pytest.mark.parametrize("input_string", bulk_inputs)
+def test_given_input_when_bulk_match_then_agree_with_match_fsm(fsm, input_string):
+    # given
+    starts = range(len(input_string) + 1)
+
+    # when
+    lengths = [fsm.match(input_string, i) for i in starts]
+
+    # then
+    assert [match_fsm(fsm, input_string, i) for i in starts] == lengths
+
+
+@pytest.mark.parametrize(
+    "input_string",
+    bulk_inputs + ["Schemes: a(b)", "Rules:-Queriesx", "Fact Facts ::- ?(,)."],
+)
+def test_given_input_when_run_fsms_then_first_longest_match_fsm(input_string):
+    # given
+    starts = range(len(input_string) + 1)
+
+    plan = lockstep_plan(FSMS)
+
+    # when
+    results = [run_fsms(FSMS, input_string, i) for i in starts]
+    planned = [run_fsms(FSMS, input_string, i, plan=plan) for i in starts]
+
+    # then
+    expected = []
+    for i in starts:
+        lengths = [match_fsm(fsm, input_string, i) for fsm in FSMS]
+        longest = max(lengths)
+        fsm = FSMS[lengths.index(longest)] if longest > 0 else None
+        expected.append((fsm, longest))
+    assert expected == results == planned
+
+
+class Twice(FiniteStateMachine):
+    """Reads up to two characters equal to the first, with no bulk `match`."""
+
+    def __init__(self) -> None:
+        super().__init__(Twice.s_0)
+
+    @staticmethod
+    def s_0(input_chars_read, input_char):
+        if input_char == "x":
+            return Twice.s_1, input_chars_read + 1
+        return FiniteStateMachine.s_reject, 0
+
+    @staticmethod
+    def s_1(input_chars_read, input_char):
+        if input_char == "x":
+            return FiniteStateMachine.s_accept, input_chars_read + 1
+        return FiniteStateMachine.s_accept, input_chars_read
+
+
+@pytest.mark.parametrize(
+    "fsms, input_string, expected",
+    [
+        (lambda twice, id: [twice, id], "xx", 0),
+        (lambda twice, id: [id, twice], "xx", 0),
+        (lambda twice, id: [twice, id], "xxx", 1),
+        (lambda twice, id: [twice, ColonDash()], "x", 0),
+    ],
+    ids=["tie-first", "tie-second", "id-longer", "still-running-at-end"],
+)
+def test_given_user_fsm_when_run_fsms_then_lowest_index_wins_ties(
+    fsms, input_string, expected
+):
+    # given
+    fsms = fsms(Twice(), ID())
+
+    # when
+    fsm, length = run_fsms(fsms, input_string)
+
+    # then
+    assert fsms[expected] is fsm
+    assert max(match_fsm(i, input_string) for i in fsms) == length
@@ -1,8 +1,12 @@
 # type: ignore
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
-from project1.token import Token
-from project1.lexer import lexer
+from project1.token import Token, TokenType
+from project1.lexer import lexer, lex_errors
+from project1.trace import CountingSink
+from tests.passoff_utils import generated_program, passoff_inputs, read_input
 
 inputs = [
     (": ", [Token("COLON", ":", 1), Token("EOF", "", 1)]),
@@ -29,3 +33,202 @@ def test_given_input_when_lexer_then_match_tokens(
     # then
     assert len(expected) == len(tokens)
     assert expected == tokens
+
+
+recover_inputs = [
+    (
+        "!:@",
+        [
+            Token("UNDEFINED", "!", 1),
+            Token("COLON", ":", 1),
+            Token("UNDEFINED", "@", 1),
+            Token("EOF", "", 1),
+        ],
+    ),
+    (
+        "a('b\n:",
+        [
+            Token("ID", "a", 1),
+            Token("LEFT_PAREN", "(", 1),
+            Token("UNDEFINED", "'", 1),
+            Token("COLON", ":", 2),
+            Token("EOF", "", 2),
+        ],
+    ),
+    ("'open", [Token("UNDEFINED", "'", 1), Token("EOF", "", 1)]),
+]
+recover_ids = [
+    "skip-character",
+    "skip-unterminated-string-line",
+    "unterminated-string-at-eof",
+]
+
+
+@pytest.mark.parametrize("test_input, expected", recover_inputs, ids=recover_ids)
+def test_given_bad_input_when_lexer_recover_then_match_tokens(
+    test_input: str, expected: list[Token]
+):
+    # given
+    # input
+
+    # when
+    tokens = [i for i in lexer(test_input, recover=True)]
+
+    # then
+    assert expected == tokens
+
+
+def test_given_bad_input_when_lex_errors_then_report_all_errors():
+    # given
+    with open("./tests/resources/project1-passoff/20/input23.txt", "r") as f:
+        input = f.read()
+
+    # when
+    tokens, errors = lex_errors(input)
+
+    # then
+    assert [3, 5, 7, 9, 11, 13, 15] == [i.line_num for i in errors][:7]
+    assert 14 == len(errors)
+    assert TokenType.EOF == tokens[-1].token_type
+
+
+hidden_inputs = [
+    (
+        "# c\n:",
+        ["WHITESPACE", "COMMENT"],
+        [Token("COLON", ":", 2), Token("EOF", "", 2)],
+    ),
+    (
+        "# c\n:",
+        [],
+        [
+            Token("COMMENT", "# c", 1),
+            Token("WHITESPACE", "\n", 1),
+            Token("COLON", ":", 2),
+            Token("EOF", "", 2),
+        ],
+    ),
+    (
+        "'a\nb' :",
+        ["STRING", "WHITESPACE"],
+        [Token("COLON", ":", 2), Token("EOF", "", 2)],
+    ),
+]
+hidden_ids = [
+    "hide-comment",
+    "hide-nothing",
+    "hide-multiline-string",
+]
+
+
+@pytest.mark.parametrize("test_input, hidden, expected", hidden_inputs, ids=hidden_ids)
+def test_given_hidden_types_when_lexer_then_skip_hidden_tokens(
+    test_input: str, hidden, expected: list[Token]
+):
+    # given
+    # input
+
+    # when
+    tokens = [i for i in lexer(test_input, hidden=hidden)]
+
+    # then
+    assert expected == tokens
+
+
+def test_given_hidden_whitespace_when_lexer_then_no_whitespace_token_created(
+    monkeypatch,
+):
+    # given
+    def fail(value):
+        raise AssertionError("hidden token was created")
+
+    monkeypatch.setattr(Token, "whitespace", staticmethod(fail))
+
+    # when
+    tokens = [i for i in lexer(" \n\t:\n")]
+
+    # then
+    assert [Token("COLON", ":", 2), Token("EOF", "", 3)] == tokens
+
+
+@pytest.mark.parametrize("hidden", [["EOF"], ["UNDEFINED"]])
+def test_given_eof_or_undefined_hidden_when_lexer_then_raise(hidden):
+    # given
+    # hidden
+
+    # when/then
+    with pytest.raises(ValueError):
+        list(lexer(":", hidden=hidden))
+
+
+def test_given_many_threads_when_lexer_then_match_single_thread():
+    # given
+    inputs = [generated_program(i) for i in range(20, 100, 10)]
+    expected = [list(lexer(i)) for i in inputs]
+
+    # when
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: list(lexer(i)), inputs * 4))
+
+    # then
+    assert expected * 4 == results
+
+
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_lexer_then_bulk_match_agrees_with_states(path):
+    # given
+    input_string = read_input(path)
+
+    # when
+    tokens = list(lexer(input_string, recover=True))
+
+    # then
+    assert list(lexer(input_string, recover=True, trace=CountingSink())) == tokens
+
+
+fact_inputs = [
+    "Facts: snap('1','it''s 1').\nsnap( '2' , 'b' ) .",
+    "Facts:\n  a('x').b('y').\nRules: c('z').",
+    "Facts: Rules('a').\nFacts('b'). Queries('c').",
+    "Facts: a('x'''). a('x'''",
+    "Facts: a('x',\n'y'). a('é'). aé('x').",
+    "Facts: a(). a('x',). a('x')",
+    "Facts: # c\na('x')# c\n.",
+]
+
+
+@pytest.mark.parametrize("input_string", fact_inputs)
+@pytest.mark.parametrize(
+    "hidden", [["WHITESPACE"], [], ["WHITESPACE", "COMMA", "STRING"]], ids=str
+)
+def test_given_facts_when_lexer_then_fast_path_agrees_with_states(input_string, hidden):
+    # given
+    expected = list(
+        lexer(input_string, recover=True, hidden=hidden, trace=CountingSink())
+    )
+
+    # when
+    tokens = list(lexer(input_string, recover=True, hidden=hidden))
+
+    # then
+    assert expected == tokens
+
+
+def test_given_facts_section_when_lexer_then_facts_skip_fsms(monkeypatch):
+    # given
+    import project1.lexer
+
+    calls = []
+    get_match = project1.lexer._get_match
+    monkeypatch.setattr(
+        project1.lexer,
+        "_get_match",
+        lambda *args: calls.append(args[2]) or get_match(*args),
+    )
+
+    # when
+    tokens = list(lexer("Facts: a('x','y').\nb('z').\nRules:"))
+
+    # then
+    assert 17 == len(tokens)
+    assert 8 == len(calls)
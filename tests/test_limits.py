@@ -0,0 +1,182 @@
+# type: ignore
+import time
+
+import pytest
+
+from project1.ascii_lexer import lexer_bytes
+from project1.lexer import lexer
+from project1.limits import (
+    InputTooLargeError,
+    LexBudgetError,
+    LexLimitError,
+    LexLimits,
+    TokenTooLongError,
+)
+from project1.project1 import project1, project1cli
+from project1.summary import summarize
+from tests.passoff_utils import passoff_inputs, read_input
+
+
+def _lex(input_string, as_bytes, **kwargs):
+    if as_bytes:
+        return list(lexer_bytes(input_string.encode("utf-8"), **kwargs))
+    return list(lexer(input_string, **kwargs))
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_within_limits_then_same_tokens(path, as_bytes):
+    # given
+    input_string = read_input(path)
+    limits = LexLimits(
+        max_input_bytes=len(input_string.encode("utf-8")),
+        max_token_length=max(len(input_string), 1),
+        max_steps=len(input_string) + 1,
+        max_seconds=60,
+    )
+
+    # when
+    result = _lex(input_string, as_bytes, recover=True, limits=limits)
+
+    # then
+    assert list(lexer(input_string, recover=True)) == result
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+@pytest.mark.parametrize(
+    "input_string, position, line_num",
+    [
+        ("a\n'" + "x" * 100, 2, 2),
+        ("a\n'" + "x" * 100 + "'", 2, 2),
+        ("a\n\n#" + "x" * 100, 3, 3),
+        ("a\n" + "b" * 100, 2, 2),
+        ("a" + " " * 100, 1, 1),
+        ("Facts:\nf('" + "x" * 100 + "').", 9, 2),
+    ],
+    ids=["unterminated", "string", "comment", "id", "whitespace", "fact"],
+)
+def test_given_long_token_when_lex_then_token_too_long(
+    input_string, position, line_num, as_bytes
+):
+    # given
+    limits = LexLimits(max_token_length=64)
+
+    # when
+    with pytest.raises(TokenTooLongError) as error:
+        _lex(input_string, as_bytes, limits=limits)
+
+    # then
+    assert position == error.value.position
+    assert line_num == error.value.line_num
+    assert 64 == error.value.limit
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+def test_given_token_at_limit_when_lex_then_no_error(as_bytes):
+    # given
+    input_string = "'" + "x" * 62 + "' " + "y" * 64
+
+    # when
+    result = _lex(input_string, as_bytes, limits=LexLimits(max_token_length=64))
+
+    # then
+    assert list(lexer(input_string)) == result
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+def test_given_huge_unterminated_string_when_lex_then_fails_fast(as_bytes):
+    # given
+    input_string = "a('" + "x" * 5_000_000
+    limits = LexLimits(max_token_length=1024)
+
+    # when
+    start = time.perf_counter()
+    with pytest.raises(TokenTooLongError) as error:
+        _lex(input_string, as_bytes, limits=limits)
+    elapsed = time.perf_counter() - start
+
+    # then
+    assert 2 == error.value.position
+    assert elapsed < 0.5
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+def test_given_large_input_when_lex_then_input_too_large(as_bytes):
+    # given
+    input_string = "é" * 10
+
+    # when
+    with pytest.raises(InputTooLargeError) as error:
+        _lex(input_string, as_bytes, limits=LexLimits(max_input_bytes=15))
+
+    # then
+    assert 15 == error.value.limit
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+def test_given_max_steps_when_lex_then_budget_error_at_next_token(as_bytes):
+    # given
+    input_string = "a b\nc d"
+
+    # when
+    with pytest.raises(LexBudgetError) as error:
+        _lex(input_string, as_bytes, limits=LexLimits(max_steps=4))
+
+    # then
+    assert (4, 2) == (error.value.position, error.value.line_num)
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+def test_given_no_time_when_lex_large_input_then_budget_error(as_bytes):
+    # given
+    input_string = "a b c\n" * 10_000
+
+    # when
+    with pytest.raises(LexBudgetError):
+        _lex(input_string, as_bytes, limits=LexLimits(max_seconds=0))
+
+
+def test_given_facts_when_max_steps_then_fast_path_counts_every_token():
+    # given
+    input_string = "Facts:\n" + "f('a','b').\n" * 10
+
+    # when
+    with pytest.raises(LexBudgetError):
+        list(lexer(input_string, limits=LexLimits(max_steps=60)))
+
+
+def test_given_limits_when_project1_and_summarize_then_raise():
+    # given
+    limits = LexLimits(max_token_length=4)
+
+    # when, then
+    with pytest.raises(LexLimitError):
+        project1("abcdefg", limits=limits)
+    with pytest.raises(LexLimitError):
+        summarize("abcdefg", limits=limits)
+
+
+@pytest.mark.parametrize(
+    "flags, message",
+    [
+        (["--max-input-bytes", "8"], "larger than 8 bytes"),
+        (["--max-token-length", "8"], "token longer than 8 characters at position 4"),
+        (["--max-steps", "2", "--summary"], "more than 2 steps at position 2"),
+    ],
+    ids=["input", "token", "steps"],
+)
+def test_given_limit_when_cli_then_exit_with_message(
+    tmp_path, monkeypatch, capsys, flags, message
+):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text("a b\n" + "c" * 20)
+    monkeypatch.setattr("sys.argv", ["project1", *flags, str(path)])
+
+    # when
+    with pytest.raises(SystemExit) as exit:
+        project1cli()
+
+    # then
+    assert 2 == exit.value.code
+    assert message in capsys.readouterr().err
@@ -0,0 +1,50 @@
+# type: ignore
+import pytest
+
+from tests import passoff_utils
+
+
+def test_given_equal_streams_when_compare_lines_then_count_lines():
+    # given
+    expected = iter(["a", "b", "c", "", ""])
+    actual = iter(["a", "b", "c"])
+
+    # when
+    result = passoff_utils.compare_lines(expected, actual)
+
+    # then
+    assert 3 == result
+
+
+def test_given_different_streams_when_compare_lines_then_report_first_difference():
+    # given
+    expected = (str(i) for i in range(1000))
+    actual = (str(i) if i != 500 else "x" for i in range(1000))
+
+    # when
+    with pytest.raises(AssertionError) as error:
+        passoff_utils.compare_lines(expected, actual, context=2)
+
+    # then
+    message = str(error.value)
+    assert "first difference at output line 501" in message
+    assert "'498'" in message and "'499'" in message
+    assert "'497'" not in message
+    assert "'500'" in message and "'x'" in message
+
+
+def test_given_short_output_when_compare_lines_then_report_end_of_output():
+    # given
+    expected = iter(["a", "b"])
+    actual = iter(["a"])
+
+    # when
+    with pytest.raises(AssertionError) as error:
+        passoff_utils.compare_lines(expected, actual)
+
+    # then
+    assert "<end of output>" in str(error.value)
+
+
+def test_given_generated_program_when_passoff_then_match_answer():
+    passoff_utils.passoff_generated(1000)
@@ -0,0 +1,153 @@
+# type: ignore
+import io
+
+import pytest
+
+from project1.lexer import lexer
+from project1.pipeline import lex_chunks, read_chunks, run_pipeline
+from project1.project1 import project1, project1cli
+from tests.passoff_utils import generated_program, passoff_inputs, read_input
+
+
+def _split(input_string, size):
+    return [input_string[i : i + size] for i in range(0, len(input_string), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_lex_chunks_then_match_lexer(path, size):
+    # given
+    input_string = read_input(path)
+
+    # when
+    tokens = list(lex_chunks(_split(input_string, size), recover=True))
+
+    # then
+    assert list(lexer(input_string, recover=True)) == tokens
+
+
+@pytest.mark.parametrize(
+    "input_string",
+    [
+        "'unterminated\n: a",
+        "x 'a'\n'b",
+        "# comment to the end",
+        "é('ü', ':-').\n:",
+        "Facts Factsx :-:",
+        "",
+    ],
+)
+@pytest.mark.parametrize("recover", [False, True])
+def test_given_split_tokens_when_lex_chunks_then_match_lexer(input_string, recover):
+    # given
+    chunks = _split(input_string, 1)
+
+    # when
+    tokens = list(lex_chunks(chunks, recover, hidden=[]))
+
+    # then
+    assert list(lexer(input_string, recover, hidden=[])) == tokens
+
+
+def test_given_long_comment_when_lex_chunks_then_buffer_rescanned_rarely(monkeypatch):
+    # given
+    input_string = "#" + "x" * 4000 + "\n:"
+    scans = []
+    import project1.pipeline
+
+    spans = project1.pipeline._spans
+    monkeypatch.setattr(
+        project1.pipeline,
+        "_spans",
+        lambda *args: scans.append(len(args[0])) or spans(*args),
+    )
+
+    # when
+    tokens = list(lex_chunks(_split(input_string, 10)))
+
+    # then
+    assert list(lexer(input_string)) == tokens
+    assert len(scans) < 20
+
+
+def test_given_file_when_read_chunks_then_join_to_text_mode_read(tmp_path):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_bytes(b"a\r\nb\rc" * 100)
+
+    # when
+    chunks = list(read_chunks(str(path), chunk_size=7))
+
+    # then
+    with open(path, "r") as f:
+        assert f.read() == "".join(chunks)
+    assert all(len(i) <= 7 for i in chunks)
+
+
+def test_given_transform_when_run_pipeline_then_write_in_order():
+    # given
+    source = [str(i) for i in range(5000)]
+    out = io.StringIO()
+
+    # when
+    run_pipeline(source, lambda chunks: (i + "\n" for i in chunks), out, depth=2)
+
+    # then
+    assert "".join(i + "\n" for i in source) == out.getvalue()
+
+
+def test_given_failing_source_when_run_pipeline_then_raise():
+    # given
+    def source():
+        yield "a"
+        raise OSError("disk")
+
+    # when/then
+    with pytest.raises(OSError, match="disk"):
+        run_pipeline(source(), lambda chunks: chunks, io.StringIO())
+
+
+def test_given_failing_output_when_run_pipeline_then_raise():
+    # given
+    class Broken(io.StringIO):
+        def write(self, text):
+            raise BrokenPipeError()
+
+    # when/then
+    with pytest.raises(BrokenPipeError):
+        run_pipeline(
+            (str(i) for i in range(100000)), lambda chunks: chunks, Broken(), depth=1
+        )
+
+
+@pytest.mark.parametrize("recover", [False, True])
+@pytest.mark.parametrize(
+    "input_string", [generated_program(300), ":\n!a\n'b", "a\r\nb\r:"]
+)
+def test_given_file_when_cli_pipeline_then_match_project1(
+    tmp_path, monkeypatch, capsys, input_string, recover
+):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_bytes(input_string.encode())
+    flags = ["--recover"] if recover else []
+    monkeypatch.setattr("sys.argv", ["project1", "--pipeline", *flags, str(path)])
+
+    # when
+    project1cli()
+
+    # then
+    with open(path, "r") as f:
+        expected = project1(f.read(), recover=recover)
+    assert expected + "\n" == capsys.readouterr().out
+
+
+def test_given_pipeline_and_summary_when_cli_then_usage_error(tmp_path, monkeypatch):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text(":")
+    monkeypatch.setattr("sys.argv", ["project1", "--pipeline", "--summary", str(path)])
+
+    # when/then
+    with pytest.raises(SystemExit):
+        project1cli()
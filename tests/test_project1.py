@@ -26,3 +26,30 @@ def test_given_bad_input_when_project1_then_output_tokens_to_undefined():
 
     # then
     assert expected == result
+
+
+def test_given_bad_input_when_project1_recover_then_output_every_error():
+    # given
+    input = "!\n:\n@:"
+    expected = (
+        '(UNDEFINED,"!",1)\n(COLON,":",2)\n(UNDEFINED,"@",3)\n(COLON,":",3)\n'
+        '(EOF,"",3)\n\nTotal Tokens = Error on lines 1, 3'
+    )
+
+    # when
+    result = project1(input, recover=True)
+
+    # then
+    assert expected == result
+
+
+def test_given_good_input_when_project1_recover_then_output_total():
+    # given
+    input = " \t\r\n::\t:\n\n"
+    expected = project1(input)
+
+    # when
+    result = project1(input, recover=True)
+
+    # then
+    assert expected == result
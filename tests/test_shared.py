@@ -0,0 +1,76 @@
+# type: ignore
+import multiprocessing
+
+import pytest
+
+from project1.lexer import lexer
+from project1.shared import SharedTokenView, share_tokens
+from tests.passoff_utils import passoff_inputs, read_input
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_share_tokens_then_match_lexer(path, as_bytes):
+    # given
+    input = read_input(path)
+
+    # when
+    with share_tokens(input.encode() if as_bytes else input, recover=True) as owner:
+        result = list(owner)
+
+    # then
+    assert list(lexer(input, recover=True)) == result
+
+
+def test_given_non_ascii_input_when_share_tokens_then_offsets_are_bytes():
+    # given
+    input = "Facts: é('ü…', 'x').\n¼"
+
+    # when
+    with share_tokens(input, recover=True) as owner:
+        result = list(owner)
+        offset = owner.offsets[4]
+
+    # then
+    assert list(lexer(input, recover=True)) == result
+    assert len("Facts: é(".encode()) == offset
+
+
+def _worker(name, queue):
+    with SharedTokenView.attach(name) as view:
+        queue.put([str(i) for i in view])
+
+
+def test_given_shared_tokens_when_worker_attaches_then_read_same_tokens():
+    # given
+    input = read_input(passoff_inputs[1])
+    queue = multiprocessing.Queue()
+
+    # when
+    with share_tokens(input) as owner:
+        worker = multiprocessing.Process(target=_worker, args=(owner.name, queue))
+        worker.start()
+        result = queue.get(timeout=30)
+        worker.join()
+
+    # then
+    assert [str(i) for i in lexer(input)] == result
+
+
+def test_given_unlinked_block_when_attach_then_raise():
+    # given
+    with share_tokens("a") as owner:
+        name = owner.name
+
+    # when/then
+    with pytest.raises(FileNotFoundError):
+        SharedTokenView.attach(name)
+
+
+def test_given_view_when_index_out_of_range_then_raise():
+    # given
+    with share_tokens("a b") as owner:
+        # when/then
+        assert "b" == owner[-2].value
+        with pytest.raises(IndexError):
+            owner[3]
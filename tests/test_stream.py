@@ -0,0 +1,137 @@
+# type: ignore
+import pytest
+
+from project1.lexer import lexer
+from project1.stream import TokenStream, UnexpectedTokenError
+from project1.token import Token, TokenType
+from tests.passoff_utils import generated_program
+
+
+def _counting(tokens):
+    def generate():
+        for i in tokens:
+            generate.pulled += 1
+            yield i
+
+    generate.pulled = 0
+    return generate
+
+
+def test_given_stream_when_peek_then_pull_lazily():
+    # given
+    source = _counting(lexer("a b c d e"))
+    stream = TokenStream(source())
+
+    # when
+    token = stream.peek(2)
+
+    # then
+    assert Token("ID", "c", 1) == token
+    assert 3 == source.pulled
+
+
+def test_given_stream_when_advance_past_end_then_repeat_eof():
+    # given
+    stream = TokenStream(lexer("a"))
+
+    # when
+    tokens = [stream.advance() for _ in range(4)]
+
+    # then
+    assert ["ID", "EOF", "EOF", "EOF"] == [i.token_type.name for i in tokens]
+    assert TokenType.EOF == stream.peek(10).token_type
+
+
+def test_given_empty_source_when_peek_then_raise():
+    # given
+    stream = TokenStream([])
+
+    # when/then
+    with pytest.raises(IndexError):
+        stream.peek()
+
+
+def test_given_nested_marks_when_reset_then_backtrack():
+    # given
+    stream = TokenStream(lexer("a b c d e f g h"), capacity=2)
+    stream.advance()
+    outer = stream.mark()
+    stream.advance()
+    inner = stream.mark()
+    for _ in range(4):
+        stream.advance()
+
+    # when
+    stream.reset(inner)
+    at_inner = stream.peek()
+    stream.reset(outer)
+
+    # then
+    assert Token("ID", "c", 1) == at_inner
+    assert Token("ID", "b", 1) == stream.peek()
+    assert 1 == stream.position
+
+
+def test_given_later_mark_when_reset_to_earlier_then_keep_tokens_ahead():
+    # given
+    stream = TokenStream(lexer("a b c d e f g h"), capacity=2)
+    first = stream.mark()
+    for _ in range(3):
+        stream.advance()
+    second = stream.mark()
+
+    # when
+    stream.reset(first)
+    values = [stream.advance().value for _ in range(5)]
+    stream.reset(second)
+
+    # then
+    assert ["a", "b", "c", "d", "e"] == values
+    assert Token("ID", "d", 1) == stream.peek()
+    assert 3 == stream.position
+
+
+def test_given_released_mark_when_reset_then_raise():
+    # given
+    stream = TokenStream(lexer("a b"))
+    mark = stream.mark()
+    stream.release(mark)
+
+    # when/then
+    with pytest.raises(ValueError):
+        stream.reset(mark)
+
+
+def test_given_wrong_type_when_expect_then_raise_without_consuming():
+    # given
+    stream = TokenStream(lexer("a:"))
+
+    # when
+    with pytest.raises(UnexpectedTokenError) as error:
+        stream.expect("COLON")
+
+    # then
+    assert TokenType.COLON == error.value.expected
+    assert Token("ID", "a", 1) == error.value.token
+    assert Token("ID", "a", 1) == stream.expect("ID")
+    assert Token("COLON", ":", 1) == stream.expect("COLON")
+
+
+def test_given_large_input_when_parse_with_marks_then_buffer_stays_small():
+    # given
+    stream = TokenStream(lexer(generated_program(500)), capacity=4)
+
+    # when
+    count = 0
+    while stream.peek().token_type is not TokenType.EOF:
+        mark = stream.mark()
+        stream.peek(3)
+        stream.advance()
+        stream.advance()
+        stream.reset(mark)
+        stream.advance()
+        count += 1
+
+    # then
+    assert 3532 == count
+    assert len(stream._ring) <= 8
@@ -0,0 +1,94 @@
+# type: ignore
+from collections import Counter
+
+import pytest
+
+from project1.lexer import lexer
+from project1.project1 import project1cli
+from project1.summary import format_summary, summarize
+from project1.token import TokenType
+from tests.passoff_utils import passoff_inputs, read_input
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_summarize_then_counts_match_lexer(path, as_bytes):
+    # given
+    input = read_input(path)
+    tokens = list(lexer(input, recover=True))
+    errors = [i.line_num for i in tokens if i.token_type is TokenType.UNDEFINED]
+
+    # when
+    result = summarize(input.encode() if as_bytes else input, recover=True)
+
+    # then
+    assert dict(Counter(i.token_type for i in tokens)) == result.counts
+    assert len(tokens) == result.total_tokens
+    assert (errors[0] if errors else None) == result.first_error_line
+    assert len(input.encode()) == result.total_bytes
+
+
+def test_given_error_when_summarize_then_stop_at_first_error():
+    # given
+    input = "a b\n!c d"
+
+    # when
+    result = summarize(input)
+
+    # then
+    assert {TokenType.ID: 2, TokenType.UNDEFINED: 1} == result.counts
+    assert 2 == result.first_error_line
+    assert 2 == result.total_lines
+
+
+def test_given_non_ascii_when_summarize_then_count_utf8_bytes():
+    # given
+    input = "é\n"
+
+    # when
+    result = summarize(input.encode())
+
+    # then
+    assert {TokenType.ID: 1, TokenType.EOF: 1} == result.counts
+    assert 3 == result.total_bytes
+    assert 1 == result.total_lines
+
+
+def test_given_summary_when_format_then_list_types_in_order():
+    # given
+    summary = summarize(":- a :")
+
+    # when
+    result = format_summary(summary)
+
+    # then
+    assert (
+        "COLON = 1\nCOLON_DASH = 1\nEOF = 1\nID = 1\n"
+        "Total Tokens = 4\nTotal Bytes = 6\nTotal Lines = 1"
+    ) == result
+
+
+@pytest.mark.parametrize(
+    "flag, input, status, output",
+    [
+        ("--check", "a(b).\n", 0, ""),
+        ("--check", "a\n(b!", 1, "Error on line 2\n"),
+        ("--summary", "a", 0, "EOF = 1\nID = 1\nTotal Tokens = 2\n"),
+    ],
+    ids=["check-ok", "check-error", "summary"],
+)
+def test_given_file_when_cli_summary_or_check_then_exit_status(
+    tmp_path, monkeypatch, capsys, flag, input, status, output
+):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text(input)
+    monkeypatch.setattr("sys.argv", ["project1", flag, str(path)])
+
+    # when
+    with pytest.raises(SystemExit) as exit:
+        project1cli()
+
+    # then
+    assert status == exit.value.code
+    assert capsys.readouterr().out.startswith(output)
@@ -0,0 +1,137 @@
+# type: ignore
+import io
+
+import pytest
+
+from project1.ascii_lexer import lexer_bytes
+from project1.binary import BinaryFormatError, read_tokens
+from project1.lexer import lexer
+from project1.symbols import (
+    SymbolTable,
+    intern_tokens,
+    read_symbols,
+    write_symbols,
+)
+from project1.token import TokenType
+from tests.passoff_utils import generated_program, passoff_inputs, read_input
+
+
+def test_given_repeated_values_when_lexer_then_share_one_copy():
+    # given
+    input_string = generated_program(20)
+    symbols = SymbolTable()
+
+    # when
+    tokens = list(lexer(input_string, symbols=symbols))
+
+    # then
+    snaps = [i for i in tokens if i.value == "snap"]
+    assert len(snaps) == 22
+    assert all(i.value is snaps[0].value for i in snaps)
+    assert {i.symbol_id for i in snaps} == {symbols.symbol_id("snap")}
+
+
+@pytest.mark.parametrize("path", passoff_inputs)
+def test_given_passoff_input_when_lex_with_symbols_then_same_tokens_and_ids(path):
+    # given
+    input_string = read_input(path)
+    str_symbols = SymbolTable()
+    bytes_symbols = SymbolTable()
+
+    # when
+    str_tokens = list(lexer(input_string, recover=True, symbols=str_symbols))
+    bytes_tokens = list(
+        lexer_bytes(input_string.encode(), recover=True, symbols=bytes_symbols)
+    )
+
+    # then
+    assert list(lexer(input_string, recover=True)) == str_tokens == bytes_tokens
+    assert [i.symbol_id for i in str_tokens] == [i.symbol_id for i in bytes_tokens]
+    assert str_symbols.values == bytes_symbols.values
+    for i in str_tokens:
+        if i.token_type in (TokenType.ID, TokenType.STRING):
+            assert i.value == str_symbols[i.symbol_id]
+        else:
+            assert i.symbol_id is None
+
+
+def test_given_tokens_when_intern_tokens_then_match_lexer_ids():
+    # given
+    input_string = "a('x'). b('x', y)?"
+    expected = list(lexer(input_string, symbols=SymbolTable()))
+
+    # when
+    tokens = list(intern_tokens(lexer(input_string), SymbolTable()))
+
+    # then
+    assert [i.symbol_id for i in expected] == [i.symbol_id for i in tokens]
+
+
+def test_given_table_when_write_and_read_then_same_values():
+    # given
+    symbols = SymbolTable(["a", "'it''s'", "é"])
+    stream = io.BytesIO()
+
+    # when
+    count = write_symbols(symbols, stream)
+    result = read_symbols(stream.getvalue())
+
+    # then
+    assert 3 == count
+    assert symbols.values == result.values
+    assert 2 == result.symbol_id("é")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"P1TK\x01",
+        b"P1SY\x02",
+        b"P1SY\x01\x02\x01a",
+        b"P1SY\x01\x02\x01a\x01a",
+        b"P1SY\x01\x01\x01\xff",
+    ],
+    ids=["empty", "magic", "version", "truncated", "duplicate", "bad-utf-8"],
+)
+def test_given_bad_table_when_read_symbols_then_raise(data):
+    # given
+    # data
+
+    # when/then
+    with pytest.raises(BinaryFormatError):
+        read_symbols(data)
+
+
+def test_given_duplicate_when_symbol_table_then_raise():
+    # given
+    values = ["a", "a"]
+
+    # when/then
+    with pytest.raises(ValueError):
+        SymbolTable(values)
+
+
+def test_given_file_when_cli_symbols_then_write_table(
+    tmp_path, monkeypatch, capsysbinary
+):
+    # given
+    path = tmp_path / "t.txt"
+    path.write_text("a('x').\nb('x').")
+    table = tmp_path / "t.sym"
+    monkeypatch.setattr(
+        "sys.argv", ["project1", "--format=binary", "--symbols", str(table), str(path)]
+    )
+    from project1.project1 import project1cli
+
+    # when
+    project1cli()
+    tokens = list(read_tokens(capsysbinary.readouterr().out))
+
+    # then
+    symbols = read_symbols(table.read_bytes())
+    assert ["a", "'x'", "b"] == symbols.values
+    rebuilt = list(intern_tokens(tokens, SymbolTable()))
+    assert [i.symbol_id for i in rebuilt] == [
+        symbols.symbol_id(i.value) for i in tokens
+    ]
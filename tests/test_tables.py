@@ -0,0 +1,202 @@
+# type: ignore
+import gzip
+
+import pytest
+
+from project1.ascii_lexer import lexer_bytes
+from project1.lexer import lexer
+from project1.project1 import project1, project1cli
+from project1.tables import (
+    FactTable,
+    fact_tokens,
+    lex_with_facts,
+    read_table,
+    render_facts,
+)
+from tests.passoff_utils import generated_program
+
+tables = [
+    FactTable("f", [["it's", "''"], ["", "a,b"], ["x\ny", "z"]]),
+    FactTable("g", [[], ["é"], ["Facts", "#|"]]),
+]
+
+hidden_types = [[], ["WHITESPACE"], ["WHITESPACE", "COMMENT", "COMMA", "STRING"]]
+
+
+def _rendered(before, after, tables):
+    rows = "".join(render_facts(tables))
+    newline = "" if not rows or before.endswith("\n") else "\n"
+    return before + newline + rows + after
+
+
+@pytest.mark.parametrize("hidden", hidden_types, ids=str)
+def test_given_tables_when_fact_tokens_then_match_lex_of_rendered_facts(hidden):
+    # given
+    rendered = "".join(render_facts(tables))
+
+    # when
+    result = list(fact_tokens(tables, 1, hidden))
+
+    # then
+    assert list(lexer(rendered, hidden=hidden))[:-1] == result
+    assert 6 == result[-1].line_num
+
+
+@pytest.mark.parametrize("hidden", hidden_types, ids=str)
+@pytest.mark.parametrize(
+    "before, after",
+    [
+        (
+            "Schemes: s(X)\nFacts:\n  s('a').\n",
+            "Rules:\n  r(X):-s(X).\nQueries: r(X)?\n",
+        ),
+        ("Facts: s('a'). ", "Rules: r(X):-s(X).\n"),
+        ("Facts: s('a').", ""),
+        ("Facts: # note", ""),
+        ("Facts: #| block\n|#", "Queries: s(X)?"),
+        ("Facts:\n", ""),
+        ("Facts:", "Facts: s('b').\nRules:"),
+    ],
+    ids=["line-start", "same-line", "eof", "comment", "block", "empty", "two-facts"],
+)
+def test_given_program_when_lex_with_facts_then_match_lex_of_rendered_program(
+    before, after, hidden
+):
+    # given
+    expected = list(lexer(_rendered(before, after, tables), hidden=hidden))
+
+    # when
+    result = list(lex_with_facts(before + after, tables, hidden=hidden))
+
+    # then
+    assert expected == result
+
+
+@pytest.mark.parametrize("recover", [False, True], ids=["stop", "recover"])
+def test_given_error_after_facts_when_lex_with_facts_then_match_lex(recover):
+    # given
+    before, after = "Facts:\n  s('a').\n", "Queries: s('b')?\n!\ns(X)?"
+    expected = list(lexer(_rendered(before, after, tables), recover))
+
+    # when
+    result = list(lex_with_facts((before + after).encode(), tables, recover))
+
+    # then
+    assert expected == result
+
+
+@pytest.mark.parametrize("recover", [False, True], ids=["stop", "recover"])
+def test_given_unterminated_string_in_facts_when_lex_with_facts_then_not_rendered(
+    recover,
+):
+    # given
+    input_string = "Facts: s('a"
+    program = list(lexer(input_string, recover))
+
+    # when
+    result = list(lex_with_facts(input_string, tables, recover))
+
+    # then
+    if recover:
+        rows = list(fact_tokens(tables, 2))
+        assert [*program[:-1], *rows, program[-1].at_line(8)] == result
+    else:
+        assert program == result
+    assert "UNDEFINED" == program[4].token_type.name
+    assert list(lexer(_rendered(input_string, "", tables), recover)) != result
+
+
+def test_given_no_rows_when_lex_with_facts_then_program_unchanged():
+    # given
+    input_string = "Facts: s('a'). Rules:"
+
+    # when
+    result = list(lex_with_facts(input_string, [FactTable("f", [[], []])], hidden=[]))
+
+    # then
+    assert list(lexer(input_string, hidden=[])) == result
+
+
+def test_given_large_program_when_lex_with_facts_then_match_lex_bytes():
+    # given
+    input_string = generated_program(50)
+    before, _, after = input_string.partition("Rules:")
+    large = [FactTable("snap", [[str(i), "it's {}".format(i)] for i in range(1000)])]
+    expected = list(lexer_bytes(_rendered(before, "Rules:" + after, large).encode()))
+
+    # when
+    result = list(lex_with_facts(input_string.encode(), large))
+
+    # then
+    assert expected == result
+
+
+@pytest.mark.parametrize(
+    "input_string, table",
+    [
+        ("a:-b.", FactTable("f", [["x"]])),
+        ("Facts: a('b').", FactTable("Rules", [["x"]])),
+        ("Facts: a('b').", FactTable("1x", [["x"]])),
+    ],
+    ids=["no-facts", "keyword", "not-id"],
+)
+def test_given_bad_program_or_table_when_lex_with_facts_then_error(input_string, table):
+    # when, then
+    with pytest.raises(ValueError):
+        list(lex_with_facts(input_string, [table]))
+
+
+def test_given_csv_tsv_and_gzip_files_when_read_table_then_rows(tmp_path):
+    # given
+    (tmp_path / "parent.csv").write_text('a,b\n"c,d","e\nf"\n\n')
+    (tmp_path / "t.tsv").write_text("a\tb,c\n")
+    with gzip.open(tmp_path / "z.tsv.gz", "wt") as f:
+        f.write("x\ty\n")
+
+    # when
+    parent = read_table(str(tmp_path / "parent.csv"))
+    likes = read_table(str(tmp_path / "t.tsv"), "likes")
+    zipped = read_table(str(tmp_path / "z.tsv.gz"))
+
+    # then
+    assert "parent" == parent.relation
+    assert [["a", "b"], ["c,d", "e\nf"], []] == list(parent.rows)
+    assert [["a", "b"], ["c,d", "e\nf"], []] == list(parent.rows)
+    assert ("likes", [["a", "b,c"]]) == (likes.relation, list(likes.rows))
+    assert ("z", [["x", "y"]]) == (zipped.relation, list(zipped.rows))
+
+
+def test_given_tables_when_cli_facts_then_match_output_of_rendered_program(
+    tmp_path, monkeypatch, capsys
+):
+    # given
+    before, after = "Facts:\n  s('a').\n", "Rules:\n  r(X):-s(X).\n"
+    path = tmp_path / "t.dl"
+    path.write_text(before + after)
+    (tmp_path / "parent.csv").write_text("a,it's\nb,c\n")
+    (tmp_path / "export.tsv").write_text("x\ty\n")
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "project1",
+            "--facts",
+            str(tmp_path / "parent.csv"),
+            "--facts",
+            "likes={}".format(tmp_path / "export.tsv"),
+            str(path),
+        ],
+    )
+    expected = _rendered(
+        before,
+        after,
+        [
+            FactTable("parent", [["a", "it's"], ["b", "c"]]),
+            FactTable("likes", [["x", "y"]]),
+        ],
+    )
+
+    # when
+    project1cli()
+
+    # then
+    assert project1(expected) + "\n" == capsys.readouterr().out
@@ -1,6 +1,9 @@
 # type: ignore
+import copy
+import pickle
+
 import pytest
-from project1.token import Token
+from project1.token import Token, TokenType
 
 
 str_test_inputs = [
@@ -56,3 +59,77 @@ def test_given_good_token_when_str_then_match_expected(token: Token, expected: s
 
     # then
     assert expected == result
+
+
+@pytest.mark.parametrize("token, expected", str_test_inputs, ids=str_test_ids)
+def test_given_token_when_at_line_then_new_token_on_that_line(
+    token: Token, expected: str
+):
+    # when
+    result = token.at_line(7)
+
+    # then
+    assert expected[:-2] + "7)" == str(result)
+    assert 0 == token.line_num
+
+
+@pytest.mark.parametrize("attribute", ["token_type", "value", "line_num", "symbol_id"])
+def test_given_token_when_set_attribute_then_error(attribute):
+    # given
+    token = Token.id("a")
+
+    # when, then
+    with pytest.raises(AttributeError):
+        setattr(token, attribute, None)
+
+
+def test_given_equal_tokens_when_hash_then_same_key():
+    # given
+    tokens = [
+        Token("ID", "a", 1),
+        Token("ID", "a", 1, 5),
+        Token("ID", "a", 2),
+        Token("STRING", "a", 1),
+    ]
+
+    # when
+    counts = {}
+    for i in tokens:
+        counts[i] = counts.get(i, 0) + 1
+
+    # then
+    assert [2, 1, 1] == list(counts.values())
+    assert tokens[0] == tokens[1] and not tokens[0] != tokens[1]
+    assert tokens[0] != tokens[2] and tokens[0] != ("ID", "a", 1, None)
+
+
+@pytest.mark.parametrize(
+    "token",
+    [Token.colon(":"), Token("STRING", "'it''s'", 12), Token("ID", "a", 3, 9)],
+    ids=["colon", "string", "interned"],
+)
+def test_given_token_when_pickle_and_copy_then_same_token(token):
+    # when
+    unpickled = pickle.loads(pickle.dumps(token, pickle.HIGHEST_PROTOCOL))
+
+    # then
+    assert type(token) is type(unpickled)
+    assert tuple(token) == tuple(unpickled)
+    assert copy.copy(token) is token
+    assert copy.deepcopy([token])[0] is token
+    assert eval(repr(token)) == token
+
+
+def test_given_names_and_codes_when_of_then_token_type():
+    # when
+    by_name = [TokenType.of(i.name) for i in TokenType]
+    by_code = [TokenType.of(int(i)) for i in TokenType]
+
+    # then
+    assert list(TokenType) == by_name == by_code
+    assert TokenType.ID is Token("ID", "a", 1).token_type
+    assert "ID" == TokenType.ID.name
+    with pytest.raises(ValueError):
+        TokenType.of("NOT_A_TYPE")
+    with pytest.raises(ValueError):
+        Token("NOT_A_TYPE", "a", 1)
@@ -0,0 +1,88 @@
+# type: ignore
+import io
+
+from project1.fsm import Colon, String, match_fsm, run_fsm
+from project1.lexer import lexer
+from project1.trace import (
+    CallbackSink,
+    CountingSink,
+    FileSink,
+    RingBufferSink,
+    TraceEvent,
+    hot_counts,
+)
+
+
+def test_given_sink_when_run_fsm_then_record_every_transition():
+    # given
+    sink = RingBufferSink()
+
+    # when
+    number_chars_read, _ = run_fsm(String(), "'a''b' x", trace=sink)
+
+    # then
+    assert 6 == number_chars_read
+    assert [
+        TraceEvent("String", "String.s_0", "'", 0, "String.s_1"),
+        TraceEvent("String", "String.s_1", "a", 1, "String.s_1"),
+        TraceEvent("String", "String.s_1", "'", 2, "String.s_2"),
+        TraceEvent("String", "String.s_2", "'", 3, "String.s_1"),
+        TraceEvent("String", "String.s_1", "b", 4, "String.s_1"),
+        TraceEvent("String", "String.s_1", "'", 5, "String.s_2"),
+        TraceEvent("String", "String.s_2", " ", 6, "FiniteStateMachine.s_accept"),
+    ] == list(sink.events)
+
+
+def test_given_sink_when_match_fsm_then_same_result_as_untraced():
+    # given
+    sink = CountingSink()
+
+    # when
+    result = match_fsm(Colon(), "a:-", 1, sink)
+
+    # then
+    assert match_fsm(Colon(), "a:-", 1) == result
+    assert {("Colon", "Colon.s_0"): 1} == dict(sink.counts)
+
+
+def test_given_small_ring_buffer_when_lexer_then_keep_latest_events():
+    # given
+    sink = RingBufferSink(capacity=3)
+
+    # when
+    tokens = list(lexer("a b", trace=sink))
+
+    # then
+    assert 3 == len(tokens)
+    assert 3 == len(sink.events)
+    assert "ID" == sink.events[-1].fsm
+    assert "" == sink.events[-1].char
+
+
+def test_given_file_sink_when_lexer_then_write_tab_separated_lines():
+    # given
+    stream = io.StringIO()
+
+    # when
+    list(lexer(":", trace=FileSink(stream)))
+
+    # then
+    lines = stream.getvalue().splitlines()
+    assert "Colon\tColon.s_0\t':'\t0\tFiniteStateMachine.s_accept" == lines[0]
+
+
+def test_given_callback_sink_when_lexer_then_counts_match_hot_counts():
+    # given
+    events = []
+    counting = CountingSink()
+
+    def record(event):
+        events.append(event)
+        counting.record(event)
+
+    # when
+    list(lexer("Facts: a('b').", trace=CallbackSink(record)))
+
+    # then
+    assert hot_counts(events) == counting.counts
+    assert ("String", "String.s_1") in dict(counting.counts.most_common(20))